@@ -1,11 +1,18 @@
 from flask_jwt_extended import JWTManager
 from flask import Flask
 from flask_migrate import Migrate
-from datetime import timedelta
 from flask_cors import CORS
+from sqlalchemy.engine import make_url
 
-from app.config import DevelopmentConfig
-from app.db import db
+from app.audit import audit
+from app.config import load_config
+from app.db import db, enable_sqlite_foreign_keys, enable_sqlite_savepoints
+from app.jobs import jobs
+from app.live_events import live_events
+from app.log import configure_logging
+from app.metrics import metrics, pool_gauges
+from app.startup import configure_models, register_blueprints, warm_pool
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -15,39 +22,45 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def create_app():
+def create_app(config=None, test_config=None):
     app = Flask(__name__)
     CORS(app, supports_credentials=True)
-    app.config.from_object(DevelopmentConfig)
-
-    app.config["JWT_SECRET_KEY"] = "your-secret-key"
-    app.config["JWT_TOKEN_LOCATION"] = ["cookies"]
-    app.config["JWT_COOKIE_SECURE"] = True
-    app.config["JWT_COOKIE_HTTPONLY"] = True
-    app.config["JWT_COOKIE_SAMESITE"] = "Lax"
-    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=15)
-    app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=7)
-    app.config["JWT_CSRF_IN_COOKIES"] = True
-    app.config['UPLOAD_FOLDER'] = 'uploads'
-    app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024
+    app.config.update(load_config(config, test_config, root_path=app.root_path))
+    configure_logging(app)
+    hops = app.config['PROXY_FIX_HOPS']
+    if hops:
+        # Без этого за прокси у всех клиентов один remote_addr и одна корзина ограничителя запросов
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
     jwt = JWTManager(app)
 
     db.init_app(app)
     migrate = Migrate(app, db)
 
-    from app.routes.users import users_bp
-    app.register_blueprint(users_bp, url_prefix='/users')
+    metrics.init_app(app)
+    metrics.register_gauge_collector(pool_gauges(lambda: db.engine))
+    jobs.init_app(app)
+    live_events.init_app(app)
+    audit.init_app(app)
+
+    register_blueprints(app)
+    if app.config['EAGER_MAPPER_CONFIGURATION']:
+        configure_models(app)
 
-    from app.routes.auth import auth_bp
-    app.register_blueprint(auth_bp, url_prefix='/auth')
+    from app.commands import register_commands
+    register_commands(app)
 
-    from app.routes.associations import association_bp
-    app.register_blueprint(association_bp, url_prefix='/associations')
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        with app.app_context():
+            enable_sqlite_foreign_keys(db.engine)
+            enable_sqlite_savepoints(db.engine)
 
-    from app.routes.subscriptions import subscriptions_bp
-    app.register_blueprint(subscriptions_bp, url_prefix='/subscriptions')
+    if app.config['CREATE_SCHEMA']:
+        from app import models
+        with app.app_context():
+            db.create_all()
 
-    from app.routes.disciplines import disciplines_bp
-    app.register_blueprint(disciplines_bp, url_prefix='/disciplines')
+    warm_pool(app)
+    app.logger.debug("Startup timings: %s", app.extensions['startup'])
 
     return app
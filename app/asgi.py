@@ -0,0 +1,238 @@
+import contextlib
+import time
+from typing import Optional
+
+import jwt
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.config import load_config
+from app.db import Base, async_database_url
+from app.live_events import (
+    STREAM_HEADERS, STREAM_PING, STREAM_READY, AsyncDatabaseTransport, AsyncSubscriber, EventBroker, stream_event
+)
+from app.repositories.aio import (
+    AsyncAssociationTeacherStudentRepository, AsyncLessonRepository, AsyncRoleRepository, AsyncSubscriptionRepository,
+    AsyncUserRepository
+)
+
+
+def authenticated_user_id(request: Request) -> Optional[int]:
+    config = request.app.state.config
+    token = request.cookies.get(config.get('JWT_ACCESS_COOKIE_NAME', 'access_token_cookie'))
+    if not token:
+        return None
+    try:
+        claims = jwt.decode(
+            token,
+            config['JWT_SECRET_KEY'],
+            algorithms=[config.get('JWT_ALGORITHM', 'HS256')],
+            options={'verify_aud': False}
+        )
+    except jwt.PyJWTError:
+        return None
+    if claims.get('type') != 'access':
+        return None
+    return int(claims[config.get('JWT_IDENTITY_CLAIM', 'sub')])
+
+
+def unauthorized():
+    return JSONResponse({"msg": "Missing or invalid access token"}, status_code=401)
+
+
+async def get_teachers_for_current_student(request: Request):
+    current_user_id = authenticated_user_id(request)
+    if current_user_id is None:
+        return unauthorized()
+
+    async with request.app.state.sessionmaker() as session:
+        current_user = await AsyncUserRepository(session).get_user_by_id(current_user_id)
+        if not current_user:
+            return JSONResponse({"message": "User not found"}, status_code=404)
+
+        student = await AsyncRoleRepository(session).get_student_by_user_id(current_user_id)
+        if not student:
+            return JSONResponse({"message": "Current user is not a student"}, status_code=403)
+
+        teachers = await AsyncAssociationTeacherStudentRepository(session).get_teachers_for_student(student.user_id)
+        return JSONResponse([{
+            "user_id": teacher.user.user_id,
+            "full_name": teacher.user.full_name,
+            "email": teacher.user.email,
+            "experience": teacher.experience,
+            "main_work": teacher.main_work,
+            "profile_picture_url": teacher.user.profile_picture_url
+        } for teacher in teachers])
+
+
+async def get_students_for_current_teacher(request: Request):
+    current_user_id = authenticated_user_id(request)
+    if current_user_id is None:
+        return unauthorized()
+
+    async with request.app.state.sessionmaker() as session:
+        current_user = await AsyncUserRepository(session).get_user_by_id(current_user_id)
+        if not current_user:
+            return JSONResponse({"message": "User not found"}, status_code=404)
+
+        teacher = await AsyncRoleRepository(session).get_teacher_by_user_id(current_user_id)
+        if not teacher:
+            return JSONResponse({"message": "Current user is not a teacher"}, status_code=403)
+
+        students = await AsyncAssociationTeacherStudentRepository(session).get_students_for_teacher(teacher.user_id)
+        return JSONResponse([{
+            "user_id": student.user.user_id,
+            "full_name": student.user.full_name,
+            "email": student.user.email,
+            "birthday": student.user.birthday.isoformat() if student.user.birthday else None,
+            "gender": student.user.gender,
+            "city": student.user.city,
+            "phone_number": student.user.phone_number,
+            "unique_code": student.user.unique_code,
+            "class_number": student.class_number,
+            "school_name": student.school_name,
+            "profile_picture_url": student.user.profile_picture_url
+        } for student in students])
+
+
+async def get_teacher_subscriptions(request: Request):
+    current_user_id = authenticated_user_id(request)
+    if current_user_id is None:
+        return unauthorized()
+
+    async with request.app.state.sessionmaker() as session:
+        subscriptions = await AsyncSubscriptionRepository(session).get_subscriptions_for_teacher(
+            current_user_id, with_lessons=True
+        )
+
+        subscriptions_data = []
+        for sub in subscriptions:
+            lessons_data = [{
+                "lesson_id": lesson.lesson_id,
+                "lesson_date_time": lesson.lesson_date_time.isoformat(),
+                "duration": lesson.duration,
+                "status": lesson.status,
+                "online_call_url": lesson.online_call_url
+            } for lesson in sorted(sub.lessons, key=lambda lesson: lesson.lesson_date_time)]
+
+            subscriptions_data.append({
+                "subscription_id": sub.subscription_id,
+                "total_lessons": sub.total_lessons,
+                "start_date": sub.start_date.isoformat(),
+                "end_date": sub.end_date.isoformat(),
+                "student_id": sub.student_id,
+                "student_full_name": sub.student.user.full_name,
+                "teacher_id": sub.teacher_id,
+                "teacher_full_name": sub.teacher.user.full_name,
+                "in_archive": sub.in_archive,
+                "lessons": lessons_data
+            })
+
+        return JSONResponse(subscriptions_data)
+
+
+async def get_upcoming_lessons(request: Request):
+    current_user_id = authenticated_user_id(request)
+    if current_user_id is None:
+        return unauthorized()
+
+    user_type = request.query_params.get('role', 'student')
+    try:
+        limit = min(int(request.query_params.get('limit', 10)), 100)
+    except ValueError:
+        return JSONResponse({"message": "limit must be an integer"}, status_code=400)
+
+    async with request.app.state.sessionmaker() as session:
+        try:
+            lessons = await AsyncLessonRepository(session).get_upcoming_lessons(current_user_id, user_type, limit)
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, status_code=400)
+
+        return JSONResponse([{
+            "lesson_id": lesson.lesson_id,
+            "lesson_date_time": lesson.lesson_date_time.isoformat(),
+            "duration": lesson.duration,
+            "status": lesson.status,
+            "online_call_url": lesson.online_call_url,
+            "subscription_id": lesson.subscription_id,
+            "teacher_id": lesson.teacher_id,
+            "student_id": lesson.student_id
+        } for lesson in lessons])
+
+
+async def stream(request: Request):
+    current_user_id = authenticated_user_id(request)
+    if current_user_id is None:
+        return unauthorized()
+
+    config = request.app.state.config
+    broker = request.app.state.live_events
+    heartbeat = config['LIVE_EVENTS_HEARTBEAT']
+    subscriber = broker.subscribe(current_user_id, limit=config['LIVE_EVENTS_MAX_ASYNC_STREAMS'])
+    if subscriber is None:
+        return JSONResponse({"message": "Too many open streams, retry later"}, status_code=503,
+                            headers={'Retry-After': str(heartbeat)})
+    try:
+        await broker.transport.ready()
+    except Exception:
+        broker.unsubscribe(subscriber)
+        raise
+
+    deadline = time.monotonic() + config['LIVE_EVENTS_STREAM_TTL']
+
+    async def events():
+        try:
+            yield STREAM_READY
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                changed = await subscriber.wait(min(heartbeat, remaining))
+                if not changed:
+                    yield STREAM_PING
+                for entity in sorted(changed):
+                    yield stream_event(entity)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers=STREAM_HEADERS)
+
+
+def create_asgi_app(config=None, test_config=None) -> Starlette:
+    loaded_config = load_config(config, test_config)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        url = loaded_config.get('ASYNC_SQLALCHEMY_DATABASE_URI') or async_database_url(
+            loaded_config['SQLALCHEMY_DATABASE_URI']
+        )
+        engine = create_async_engine(url)
+        if loaded_config.get('CREATE_SCHEMA'):
+            from app import models
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        app.state.engine = engine
+        app.state.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        transport = AsyncDatabaseTransport(app.state.sessionmaker, loaded_config['LIVE_EVENTS_POLL_INTERVAL'])
+        app.state.live_events = EventBroker(transport, subscriber_class=AsyncSubscriber)
+        yield
+        await transport.close()
+        await engine.dispose()
+
+    app = Starlette(
+        debug=loaded_config.get('DEBUG', False),
+        routes=[
+            Route('/associations/teachers_for_current_student', get_teachers_for_current_student, methods=['GET']),
+            Route('/associations/students_for_current_teacher', get_students_for_current_teacher, methods=['GET']),
+            Route('/subscriptions/teacher', get_teacher_subscriptions, methods=['GET']),
+            Route('/lessons/upcoming', get_upcoming_lessons, methods=['GET']),
+            Route('/sync/stream', stream, methods=['GET']),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.config = loaded_config
+    return app
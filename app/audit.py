@@ -0,0 +1,230 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from typing import List, Optional
+
+from flask import Flask, current_app, has_app_context, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session
+
+from app.db import db
+from app.metrics import metrics
+from app.models import (
+    Administrator, AuditRecord, Discipline, StudentTeacherAssociation, Subscription, TeacherDisciplineAssociation, User
+)
+from app.repositories.sync_repository import entity_key
+
+logger = logging.getLogger(__name__)
+
+# модель -> имя сущности в журнале
+AUDITED = {
+    User: 'users',
+    Administrator: 'administrators',
+    Subscription: 'subscriptions',
+    Discipline: 'disciplines',
+    StudentTeacherAssociation: 'student_teachers',
+    TeacherDisciplineAssociation: 'teacher_disciplines',
+}
+# Значения не попадают в журнал, видно только, что поле менялось
+REDACTED = {'password_hash'}
+_SESSION_KEY = 'audit_pending'
+
+
+def _value(key: str, value):
+    if key in REDACTED:
+        return '***'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _actor_id() -> Optional[int]:
+    if not has_request_context():
+        return None
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        # Запрос без проверенного токена: регистрация, вход
+        return None
+    return int(identity) if identity is not None else None
+
+
+def _changes(instance, action: str) -> dict:
+    state = inspect(instance)
+    changes = {}
+    for attribute in state.mapper.column_attrs:
+        key = attribute.key
+        if action == 'update':
+            history = state.attrs[key].history
+            if history.has_changes():
+                old = history.deleted[0] if history.deleted else None
+                new = history.added[0] if history.added else None
+                changes[key] = [_value(key, old), _value(key, new)]
+        else:
+            # Из словаря состояния, а не через атрибут: чтение не должно догружать строку из базы
+            changes[key] = _value(key, state.dict.get(key))
+    return changes
+
+
+def _row(action, entity, key, changes, actor_id, endpoint, created_at) -> dict:
+    return {
+        "created_at": created_at,
+        "actor_id": actor_id,
+        "action": action,
+        "entity": entity,
+        "entity_key": str(key),
+        "changes": json.dumps(changes, ensure_ascii=False, default=str),
+        "endpoint": endpoint,
+    }
+
+
+@event.listens_for(Session, 'after_flush')
+def capture_changes(session, flush_context):
+    # После flush ключи новых строк уже известны, а история атрибутов ещё не сброшена.
+    # Записи копятся в сессии и уходят в журнал только после commit
+    if not has_app_context() or 'audit' not in current_app.extensions:
+        return
+    records = []
+    for action, instances in (('create', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for instance in instances:
+            entity = AUDITED.get(type(instance))
+            if entity is None:
+                continue
+            changes = _changes(instance, action)
+            if action == 'update' and not changes:
+                continue
+            records.append((action, entity, entity_key(instance), changes))
+    if records:
+        actor_id = _actor_id()
+        endpoint = request.endpoint if has_request_context() else None
+        now = datetime.utcnow()
+        session.info.setdefault(_SESSION_KEY, []).extend(
+            _row(action, entity, key, changes, actor_id, endpoint, now) for action, entity, key, changes in records
+        )
+
+
+@event.listens_for(Session, 'after_commit')
+def submit_changes(session):
+    records = session.info.pop(_SESSION_KEY, None)
+    if records:
+        current_app.extensions['audit'].submit(records)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_changes(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+class AuditWriter:
+    # Запрос только кладёт записи в очередь; поток процесса забирает их пачками и пишет одним
+    # многострочным INSERT. Если очередь переполнена (база недоступна дольше, чем она вмещает),
+    # новые записи отбрасываются со счётчиком, а не тормозят запросы
+    def __init__(self, app: Flask):
+        self.app = app
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_FLUSH_INTERVAL']
+        self.max_queue = app.config['AUDIT_MAX_QUEUE']
+        self._queue: Optional[queue.Queue] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> queue.Queue:
+        # Очередь и поток мастера не переживают fork: в каждом процессе создаются заново
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                threading.Thread(target=self._run, args=(self._queue,), name='audit-writer', daemon=True).start()
+                atexit.register(self.flush)
+            return self._queue
+
+    def submit(self, records: List[dict]):
+        pending = self._ensure_started()
+        for record in records:
+            try:
+                pending.put_nowait(record)
+            except queue.Full:
+                metrics.inc("audit_records_dropped_total")
+                logger.warning("Audit queue is full, dropped record %s %s:%s",
+                               record["action"], record["entity"], record["entity_key"])
+
+    def record(self, action: str, entity: str, key, changes: dict, actor_id: Optional[int] = None):
+        # Для изменений мимо ORM (многострочные INSERT, UPDATE по условию), которые
+        # after_flush не видит. actor_id - для фоновых задач, выполняющих чужой запрос
+        self.submit([_row(action, entity, key, changes, actor_id if actor_id is not None else _actor_id(),
+                          request.endpoint if has_request_context() else None, datetime.utcnow())])
+
+    def record_many(self, action: str, entity: str, keys, changes: dict, actor_id: Optional[int] = None):
+        actor_id = actor_id if actor_id is not None else _actor_id()
+        endpoint = request.endpoint if has_request_context() else None
+        now = datetime.utcnow()
+        rows = [_row(action, entity, key, changes, actor_id, endpoint, now) for key in keys]
+        if rows:
+            self.submit(rows)
+
+    def _next_batch(self, pending: queue.Queue) -> List[dict]:
+        # Первая запись ждётся сколько угодно, остальные - не дольше flush_interval от неё
+        batch = [pending.get()]
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.append(pending.get(timeout=remaining))
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch: List[dict]):
+        with self.app.app_context():
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(insert(AuditRecord), batch)
+            except Exception:
+                logger.exception("Failed to write %s audit records", len(batch))
+                metrics.inc("audit_records_dropped_total", amount=len(batch))
+                return
+        metrics.inc("audit_records_written_total", amount=len(batch))
+
+    def _run(self, pending: queue.Queue):
+        while True:
+            batch = self._next_batch(pending)
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    pending.task_done()
+
+    def flush(self):
+        # Дождаться, пока поток допишет всё принятое: при выходе процесса и в тестах
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+
+class Audit:
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.extensions['audit'] = AuditWriter(app)
+
+    def record(self, action: str, entity: str, key, changes: dict, actor_id: Optional[int] = None):
+        current_app.extensions['audit'].record(action, entity, key, changes, actor_id=actor_id)
+
+    def record_many(self, action: str, entity: str, keys, changes: dict, actor_id: Optional[int] = None):
+        # Одинаковое изменение многих строк одним UPDATE: архивация абонементов
+        current_app.extensions['audit'].record_many(action, entity, keys, changes, actor_id=actor_id)
+
+    def flush(self):
+        current_app.extensions['audit'].flush()
+
+
+audit = Audit()
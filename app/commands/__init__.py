@@ -0,0 +1,15 @@
+from .jobs import jobs_cli
+from .lessons import lessons_cli
+from .reminders import reminders_cli
+from .seed import seed_command
+from .subscriptions import subscriptions_cli
+from .users import users_cli
+
+
+def register_commands(app):
+    app.cli.add_command(seed_command)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(subscriptions_cli)
+    app.cli.add_command(lessons_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(reminders_cli)
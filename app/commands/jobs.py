@@ -0,0 +1,72 @@
+import json
+import multiprocessing
+import os
+import signal
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.db import db
+from app.jobs import jobs
+from app.repositories.job_repository import JobRepository
+
+jobs_cli = AppGroup('jobs', help='Фоновые задачи.')
+
+
+def _worker_process(app, burst):
+    with app.app_context():
+        # close=False: сокеты родителя не закрываем, а просто забываем о них в этом процессе
+        db.engine.dispose(close=False)
+    jobs.work(app, burst=burst)
+
+
+@jobs_cli.command('worker')
+@click.option('--processes', type=int, default=1, show_default=True, help='Число процессов-воркеров.')
+@click.option('--burst', is_flag=True, help='Выйти, когда очередь опустеет.')
+def worker_command(processes, burst):
+    app = current_app._get_current_object()
+    if processes <= 1:
+        jobs.work(app, burst=burst)
+        return
+
+    context = multiprocessing.get_context('fork')
+    children = [context.Process(target=_worker_process, args=(app, burst), daemon=False) for _ in range(processes)]
+    for child in children:
+        child.start()
+    click.echo(f"Started {processes} job workers: {', '.join(str(child.pid) for child in children)}")
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+
+
+@jobs_cli.command('enqueue')
+@click.argument('name')
+@click.option('--payload', default='{}', help='Аргументы задачи в JSON.')
+@click.option('--delay', type=float, default=None, help='Отложить запуск на столько секунд.')
+def enqueue_command(name, payload, delay):
+    try:
+        job = jobs.enqueue(name, json.loads(payload), delay=delay)
+        db.session.commit()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if current_app.config['JOBS_EAGER']:
+        click.echo(f"Ran {name} inline: {job!r}")
+    elif job is None:
+        click.echo(f"{name} is already queued")
+    else:
+        click.echo(f"Enqueued job {job.job_id} ({name})")
+
+
+@jobs_cli.command('stats')
+def stats_command():
+    depth = JobRepository(db.session).queue_depth()
+    for status in ('queued', 'running', 'succeeded', 'failed'):
+        click.echo(f"{status:10s} {depth.get(status, 0):>10d}")
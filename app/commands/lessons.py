@@ -0,0 +1,25 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.audit import audit
+from app.db import db
+from app.repositories.lesson_repository import LessonRepository
+
+lessons_cli = AppGroup('lessons', help='Обслуживание уроков.')
+
+
+@lessons_cli.command('finish-past')
+@click.option('--status', type=click.Choice(['completed', 'missed']), default=None,
+              help='Итоговый статус (по умолчанию LESSONS_PAST_STATUS).')
+@click.option('--before', type=click.DateTime(), default=None,
+              help='Обработать уроки, начавшиеся раньше этого момента (по умолчанию сейчас).')
+@click.option('--chunk-size', type=int, default=20000, show_default=True, help='Уроков в одном UPDATE.')
+def finish_past_command(status, before, chunk_size):
+    status = status or current_app.config['LESSONS_PAST_STATUS']
+    totals = LessonRepository(db.session).finish_past_lessons(before, status, chunk_size)
+    # Абонементы архивируются UPDATE мимо ORM - в журнал аудита записываем явно
+    audit.record_many('update', 'subscriptions', totals['archived_subscription_ids'], {"in_archive": [False, True]})
+    audit.flush()
+    click.echo(f"Marked {totals['lessons']} lessons as {status}, "
+               f"archived {totals['archived_subscriptions']} subscriptions")
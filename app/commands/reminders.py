@@ -0,0 +1,22 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.reminders import ReminderService
+
+reminders_cli = AppGroup('reminders', help='Напоминания об уроках.')
+
+
+@reminders_cli.command('run')
+@click.option('--once', is_flag=True, help='Загрузить окно, отправить наступившие напоминания и выйти.')
+def run_command(once):
+    ReminderService(current_app._get_current_object()).run(once=once)
+
+
+@reminders_cli.command('preview')
+def preview_command():
+    service = ReminderService(current_app._get_current_object())
+    loaded = service.refresh()
+    click.echo(f"Loaded {loaded} lessons until {service.loaded_until:%Y-%m-%d %H:%M}")
+    next_fire_at = service.scheduler.next_fire_at()
+    click.echo(f"Next reminder at {next_fire_at:%Y-%m-%d %H:%M}" if next_fire_at else "No reminders scheduled")
@@ -0,0 +1,274 @@
+import random
+import time as timer
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, List
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+from app.db import db
+from app.models import (
+    Administrator, Branch, Classroom, Discipline, Lesson, Parent, Student, StudentTeacherAssociation,
+    Subscription, Teacher, TeacherDisciplineAssociation, User
+)
+
+CITIES = ("Москва", "Санкт-Петербург", "Казань", "Пермь", "Самара", "Екатеринбург", "Новосибирск")
+FIRST_NAMES = ("Александр", "Мария", "Иван", "Анна", "Дмитрий", "Елена", "Сергей", "Ольга", "Никита", "Дарья")
+LAST_NAMES = ("Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков")
+SCHOOLS = ("Школа №1", "Школа №17", "Гимназия №5", "Лицей №2", "Школа №42")
+LESSON_DURATIONS = (30, 45, 60)
+
+
+class SeedPlan:
+    def __init__(
+            self,
+            students: int,
+            teachers: int,
+            parents: int,
+            administrators: int,
+            disciplines: int,
+            branches: int,
+            classrooms_per_branch: int,
+            teachers_per_student: int,
+            subscriptions_per_student: int,
+            lessons_per_subscription: int,
+            anchor_date: date,
+            password: str,
+            random_seed: int,
+            chunk_size: int
+    ):
+        self.students = students
+        self.teachers = max(1, teachers)
+        self.parents = parents
+        self.administrators = max(1, administrators)
+        self.disciplines = disciplines
+        self.branches = branches
+        self.classrooms_per_branch = classrooms_per_branch
+        self.teachers_per_student = max(1, min(teachers_per_student, self.teachers))
+        self.subscriptions_per_student = subscriptions_per_student
+        self.lessons_per_subscription = lessons_per_subscription
+        self.anchor_date = anchor_date
+        self.password = password
+        self.random_seed = random_seed
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_scale(cls, scale: float, **overrides) -> "SeedPlan":
+        students = max(1, int(1000 * scale))
+        teachers = max(1, students // 15)
+        defaults = {
+            "students": students,
+            "teachers": teachers,
+            "parents": students // 2,
+            "administrators": max(1, teachers // 20),
+            "disciplines": 20,
+            "branches": max(1, teachers // 10),
+            "classrooms_per_branch": 8,
+            "teachers_per_student": 2,
+            "subscriptions_per_student": 2,
+            "lessons_per_subscription": 12,
+            "anchor_date": date.today(),
+            "password": "password",
+            "random_seed": 42,
+            "chunk_size": 5000,
+        }
+        defaults.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**defaults)
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _next_id(connection, column) -> int:
+    return (connection.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def seed_database(connection, plan: SeedPlan, progress=None) -> dict:
+    # executemany по одному INSERT на пачку: mysql-connector сворачивает его в многострочный
+    # INSERT ... VALUES (...), (...), а SQLAlchemy не перекомпилирует выражение на каждую пачку
+    rng = random.Random(plan.random_seed)
+    password_hash = generate_password_hash(plan.password)
+    anchor = datetime.combine(plan.anchor_date, time())
+    counts = {}
+
+    def bulk_insert(model, rows):
+        total = 0
+        started = timer.perf_counter()
+        for chunk in _chunks(rows, plan.chunk_size):
+            connection.execute(insert(model.__table__), chunk)
+            total += len(chunk)
+        counts[model.__tablename__] = total
+        if progress:
+            progress(model.__tablename__, total, timer.perf_counter() - started)
+
+    first_user_id = _next_id(connection, User.user_id)
+    admin_ids = range(first_user_id, first_user_id + plan.administrators)
+    teacher_ids = range(admin_ids.stop, admin_ids.stop + plan.teachers)
+    student_ids = range(teacher_ids.stop, teacher_ids.stop + plan.students)
+    parent_ids = range(student_ids.stop, student_ids.stop + plan.parents)
+
+    def users():
+        for user_id in range(first_user_id, parent_ids.stop):
+            yield {
+                "user_id": user_id,
+                "full_name": f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}",
+                "email": f"seed.{user_id}@example.test",
+                "password_hash": password_hash,
+                "created_at": anchor - timedelta(days=rng.randrange(1, 730)),
+                "birthday": date(1960, 1, 1) + timedelta(days=rng.randrange(20000)),
+                "gender": rng.choice(("Male", "Female")),
+                "city": rng.choice(CITIES),
+                "phone_number": f"+79{user_id:09d}",
+                "profile_picture_url": None,
+                # 12 символов: не совпадает с кодами generate_unique_code (8, 9 и 11 символов)
+                "unique_code": f"S{user_id:011d}",
+            }
+
+    bulk_insert(User, users())
+    bulk_insert(Administrator, ({"Users_user_id": user_id, "access_level": rng.choice(("logs", "full"))}
+                                for user_id in admin_ids))
+    bulk_insert(Teacher, ({"user_id": user_id, "experience": rng.randrange(40), "main_work": rng.choice(SCHOOLS)}
+                          for user_id in teacher_ids))
+    bulk_insert(Student, ({"user_id": user_id, "class_number": rng.randrange(1, 12), "school_name": rng.choice(SCHOOLS)}
+                          for user_id in student_ids))
+    bulk_insert(Parent, ({"user_id": user_id, "work_name": rng.choice(SCHOOLS), "work_phone": f"+78{user_id:09d}"}
+                         for user_id in parent_ids))
+
+    first_discipline_id = _next_id(connection, Discipline.discipline_id)
+    discipline_ids = range(first_discipline_id, first_discipline_id + plan.disciplines)
+    bulk_insert(Discipline, ({
+        "discipline_id": discipline_id,
+        "name": f"Дисциплина {discipline_id}",
+        "description": "Сгенерировано командой flask seed",
+        "created_at": anchor - timedelta(days=rng.randrange(365, 730)),
+        "administrator_id": rng.choice(admin_ids),
+    } for discipline_id in discipline_ids))
+
+    if discipline_ids:
+        bulk_insert(TeacherDisciplineAssociation, ({"teacher_id": teacher_id, "discipline_id": discipline_id}
+                                                   for teacher_id in teacher_ids
+                                                   for discipline_id in rng.sample(discipline_ids, min(2, len(discipline_ids)))))
+
+    first_branch_id = _next_id(connection, Branch.branch_id)
+    branch_admins = {branch_id: rng.choice(admin_ids)
+                     for branch_id in range(first_branch_id, first_branch_id + plan.branches)}
+    bulk_insert(Branch, ({
+        "branch_id": branch_id,
+        "address": f"{rng.choice(CITIES)}, ул. Ленина, {branch_id}",
+        "working_start": time(8),
+        "working_end": time(20),
+        "description": None,
+        "photo_url": None,
+        "updated_at": anchor,
+        "administrator_id": administrator_id,
+    } for branch_id, administrator_id in branch_admins.items()))
+
+    first_classroom_id = _next_id(connection, Classroom.classroom_id)
+    bulk_insert(Classroom, ({
+        "classroom_id": first_classroom_id + index * plan.classrooms_per_branch + number,
+        "name": f"{number + 1:03d}",
+        "description": None,
+        "updated_at": anchor,
+        "branch_id": branch_id,
+        "administrator_id": administrator_id,
+    } for index, (branch_id, administrator_id) in enumerate(branch_admins.items())
+        for number in range(plan.classrooms_per_branch)))
+
+    # Связи ученик-учитель держим в памяти компактно: они нужны и абонементам, и урокам
+    student_teachers = [tuple(rng.sample(teacher_ids, plan.teachers_per_student)) for _ in student_ids]
+    bulk_insert(StudentTeacherAssociation, ({"student_user_id": student_id, "teacher_user_id": teacher_id}
+                                            for student_id, teachers in zip(student_ids, student_teachers)
+                                            for teacher_id in teachers))
+
+    first_subscription_id = _next_id(connection, Subscription.subscription_id)
+    subscription_plan = []
+    for student_id, teachers in zip(student_ids, student_teachers):
+        for _ in range(plan.subscriptions_per_student):
+            start_date = plan.anchor_date - timedelta(days=rng.randrange(-30, 365))
+            subscription_plan.append((student_id, rng.choice(teachers), start_date, time(rng.randrange(8, 19))))
+
+    def subscriptions():
+        weeks = plan.lessons_per_subscription
+        for offset, (student_id, teacher_id, start_date, _) in enumerate(subscription_plan):
+            end_date = start_date + timedelta(weeks=weeks)
+            yield {
+                "subscription_id": first_subscription_id + offset,
+                "total_lessons": plan.lessons_per_subscription,
+                "start_date": start_date,
+                "end_date": end_date,
+                "created_at": datetime.combine(start_date, time()) - timedelta(days=1),
+                "in_archive": end_date < plan.anchor_date - timedelta(days=30),
+                "student_id": student_id,
+                "teacher_id": teacher_id,
+            }
+
+    bulk_insert(Subscription, subscriptions())
+
+    first_lesson_id = _next_id(connection, Lesson.lesson_id)
+
+    def lessons():
+        lesson_id = first_lesson_id
+        for offset, (student_id, teacher_id, start_date, slot) in enumerate(subscription_plan):
+            for week in range(plan.lessons_per_subscription):
+                starts_at = datetime.combine(start_date + timedelta(weeks=week), slot)
+                if starts_at >= anchor:
+                    status = "scheduled"
+                else:
+                    status = rng.choices(("completed", "missed", "cancelled_in_time"), (90, 4, 6))[0]
+                yield {
+                    "lesson_id": lesson_id,
+                    "lesson_date_time": starts_at,
+                    "duration": rng.choice(LESSON_DURATIONS),
+                    "status": status,
+                    "created_at": datetime.combine(start_date, time()) - timedelta(days=1),
+                    "online_call_url": f"https://meet.example.test/{lesson_id}" if rng.random() < 0.3 else None,
+                    "subscription_id": first_subscription_id + offset,
+                    "teacher_id": teacher_id,
+                    "student_id": student_id,
+                }
+                lesson_id += 1
+
+    bulk_insert(Lesson, lessons())
+    return counts
+
+
+@click.command('seed')
+@click.option('--scale', type=float, default=1.0, show_default=True,
+              help='Множитель объёма: 1.0 = 1000 учеников, остальное считается от них.')
+@click.option('--seed', 'random_seed', type=int, default=None, help='Зерно генератора (по умолчанию 42).')
+@click.option('--students', type=int, default=None)
+@click.option('--teachers', type=int, default=None)
+@click.option('--parents', type=int, default=None)
+@click.option('--administrators', type=int, default=None)
+@click.option('--disciplines', type=int, default=None)
+@click.option('--branches', type=int, default=None)
+@click.option('--classrooms-per-branch', type=int, default=None)
+@click.option('--teachers-per-student', type=int, default=None)
+@click.option('--subscriptions-per-student', type=int, default=None)
+@click.option('--lessons-per-subscription', type=int, default=None)
+@click.option('--anchor-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Дата "сегодня" для генерации; задайте её, чтобы результат не зависел от дня запуска.')
+@click.option('--password', default=None, help='Пароль всех сгенерированных пользователей.')
+@click.option('--chunk-size', type=int, default=None, help='Строк в одном INSERT.')
+@with_appcontext
+def seed_command(scale, anchor_date, **overrides):
+    plan = SeedPlan.from_scale(scale, anchor_date=anchor_date.date() if anchor_date else None, **overrides)
+
+    def progress(table, rows, elapsed):
+        rate = rows / elapsed if elapsed else 0
+        click.echo(f"{table:28s} {rows:>10d} rows  {elapsed:7.2f}s  {rate:>10.0f} rows/s")
+
+    started = timer.perf_counter()
+    with db.engine.begin() as connection:
+        counts = seed_database(connection, plan, progress=progress)
+    click.echo(f"Seeded {sum(counts.values())} rows in {timer.perf_counter() - started:.2f}s")
@@ -0,0 +1,22 @@
+import click
+from flask.cli import AppGroup
+
+from app.audit import audit
+from app.db import db
+from app.repositories.subscription_repository import SubscriptionRepository
+
+subscriptions_cli = AppGroup('subscriptions', help='Обслуживание абонементов.')
+
+
+@subscriptions_cli.command('archive-expired')
+@click.option('--date', 'today', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Считать этот день текущим (по умолчанию сегодня).')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Абонементов в одном UPDATE.')
+def archive_expired_command(today, chunk_size):
+    archived = SubscriptionRepository(db.session).archive_expired_subscriptions(
+        today.date() if today else None, chunk_size
+    )
+    # Архивация идёт UPDATE мимо ORM - в журнал аудита записываем явно
+    audit.record_many('update', 'subscriptions', archived, {"in_archive": [False, True]})
+    audit.flush()
+    click.echo(f"Archived {len(archived)} subscriptions")
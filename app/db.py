@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event
+from sqlalchemy.engine import make_url
 
 class Base(DeclarativeBase):
     metadata = MetaData(naming_convention={
@@ -11,4 +12,36 @@ class Base(DeclarativeBase):
         "pk": "pk_%(table_name)s"
     })
 
-db = SQLAlchemy(model_class=Base)
\ No newline at end of file
+db = SQLAlchemy(model_class=Base)
+
+
+def enable_sqlite_foreign_keys(engine):
+    # SQLite по умолчанию не проверяет внешние ключи, а MySQL (InnoDB) проверяет
+    @event.listens_for(engine, "connect")
+    def _set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def enable_sqlite_savepoints(engine):
+    # pysqlite сам открывает транзакцию только перед DML, поэтому SAVEPOINT в начале сессии
+    # оказывался вне транзакции, и RELEASE его коммитил. Как в MySQL: BEGIN в начале каждой транзакции
+    @event.listens_for(engine, "connect")
+    def _disable_implicit_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import signal
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app
+
+from app.db import db
+from app.metrics import metrics
+from app.repositories.job_repository import JobRepository
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    def __init__(self, name: str, func: Callable, max_attempts: int):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+
+
+class Jobs:
+    def __init__(self, app: Optional[Flask] = None):
+        self.tasks: Dict[str, Task] = {}
+        # (имя задачи, период в секундах, payload)
+        self.schedule: List[Tuple[str, int, dict]] = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault("JOBS_EAGER", False)
+        app.config.setdefault("JOBS_POLL_INTERVAL", 1.0)
+        app.config.setdefault("JOBS_BATCH_SIZE", 10)
+        app.config.setdefault("JOBS_BACKOFF_BASE", 5)
+        app.config.setdefault("JOBS_BACKOFF_MAX", 3600)
+        app.config.setdefault("JOBS_STALE_TIMEOUT", 600)
+        app.config.setdefault("JOBS_RETENTION_DAYS", 7)
+        app.extensions["jobs"] = self
+
+        # Задачи регистрируются декораторами при импорте модуля
+        from app import tasks
+
+        metrics.register_gauge_collector(self._queue_depth_gauges(app), per_process=False)
+
+    def task(self, name: Optional[str] = None, max_attempts: int = 5):
+        def decorator(func: Callable) -> Callable:
+            task_name = name or f"{func.__module__}.{func.__name__}"
+            self.tasks[task_name] = Task(task_name, func, max_attempts)
+            func.task_name = task_name
+            return func
+
+        return decorator
+
+    def periodic(self, name: str, every: int, payload: Optional[dict] = None):
+        self.schedule.append((name, every, payload or {}))
+
+    def enqueue(
+            self,
+            task,
+            payload: Optional[dict] = None,
+            delay: Optional[float] = None,
+            run_at: Optional[datetime] = None,
+            dedupe_key: Optional[str] = None
+    ):
+        name = getattr(task, "task_name", task)
+        if name not in self.tasks:
+            raise ValueError(f"Неизвестная задача: {name}")
+        if delay is not None:
+            run_at = datetime.utcnow() + timedelta(seconds=delay)
+
+        # Режим для тестов и локальной отладки: выполняем сразу, без очереди
+        if current_app.config["JOBS_EAGER"]:
+            return self.tasks[name].func(**(payload or {}))
+
+        # Задача попадёт в очередь, когда вызывающий закоммитит сессию
+        return JobRepository(db.session).enqueue(
+            name, payload, run_at=run_at, max_attempts=self.tasks[name].max_attempts, dedupe_key=dedupe_key
+        )
+
+    def enqueue_due_periodic(self, now: Optional[datetime] = None) -> int:
+        # Ключ слота одинаков у всех воркеров, поэтому уникальный индекс пропустит ровно одну вставку
+        now = now or datetime.utcnow()
+        repository = JobRepository(db.session)
+        enqueued = 0
+        for name, every, payload in self.schedule:
+            slot = int(now.timestamp()) // every
+            job = repository.enqueue(
+                name, payload, run_at=now, max_attempts=self.tasks[name].max_attempts,
+                dedupe_key=f"periodic:{name}:{slot}"
+            )
+            if job is not None:
+                enqueued += 1
+        db.session.commit()
+        return enqueued
+
+    def backoff(self, attempts: int) -> timedelta:
+        config = current_app.config
+        return timedelta(seconds=min(config["JOBS_BACKOFF_BASE"] * 2 ** (attempts - 1), config["JOBS_BACKOFF_MAX"]))
+
+    def run_job(self, job) -> str:
+        repository = JobRepository(db.session)
+        task = self.tasks.get(job.name)
+        started = time.perf_counter()
+        try:
+            if task is None:
+                raise LookupError(f"Неизвестная задача: {job.name}")
+            task.func(**json.loads(job.payload))
+        except Exception:
+            db.session.rollback()
+            logger.exception("Job %s (%s) failed on attempt %s", job.job_id, job.name, job.attempts)
+            retry_in = self.backoff(job.attempts) if task is not None and job.attempts < job.max_attempts else None
+            status = repository.mark_failed(job.job_id, traceback.format_exc(limit=20), retry_in)
+            status = "retried" if status == "queued" else status
+        else:
+            repository.mark_succeeded(job.job_id)
+            status = "succeeded"
+
+        labels = (("job", job.name),)
+        metrics.inc("jobs_processed_total", labels + (("status", status),))
+        metrics.observe("job_duration_seconds", labels, time.perf_counter() - started)
+        return status
+
+    def run_pending(self, worker_id: str, limit: Optional[int] = None) -> int:
+        limit = limit or current_app.config["JOBS_BATCH_SIZE"]
+        jobs = JobRepository(db.session).claim(worker_id, limit)
+        for job in jobs:
+            self.run_job(job)
+        return len(jobs)
+
+    def work(self, app: Flask, worker_id: Optional[str] = None, burst: bool = False):
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        stopping = []
+
+        def stop(signum, frame):
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        poll_interval = app.config["JOBS_POLL_INTERVAL"]
+        stale_timeout = timedelta(seconds=app.config["JOBS_STALE_TIMEOUT"])
+        next_maintenance = 0.0
+        logger.info("Job worker %s started", worker_id)
+        # Текущая задача всегда доделывается: сигнал лишь прерывает цикл опроса
+        while not stopping:
+            with app.app_context():
+                try:
+                    if time.monotonic() >= next_maintenance:
+                        next_maintenance = time.monotonic() + poll_interval * 10
+                        requeued, failed = JobRepository(db.session).requeue_stale(stale_timeout)
+                        if requeued or failed:
+                            logger.warning("Stale jobs: %s requeued, %s failed after the last attempt", requeued, failed)
+                        self.enqueue_due_periodic()
+                    processed = self.run_pending(worker_id)
+                finally:
+                    metrics.write_snapshot()
+                    db.session.remove()
+            if burst and not processed:
+                break
+            if not processed:
+                time.sleep(poll_interval)
+        logger.info("Job worker %s stopped", worker_id)
+
+    def _queue_depth_gauges(self, app: Flask):
+        def collect():
+            with app.app_context():
+                try:
+                    depth = JobRepository(db.session).queue_depth()
+                finally:
+                    db.session.remove()
+            for status in ("queued", "running", "failed"):
+                yield "jobs_queue_depth", (("status", status),), depth.get(status, 0)
+
+        return collect
+
+
+jobs = Jobs()
@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from flask import Flask, current_app
+
+from app.db import db
+from app.metrics import metrics
+from app.repositories.aio.live_event_repository import AsyncLiveEventRepository
+from app.repositories.live_event_repository import LiveEventRepository
+from app.signals import lessons_changed, subscriptions_changed
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[Optional[Iterable[int]], str], None]
+
+# Событие говорит только, что сущность изменилась: сами данные клиент забирает через
+# GET /sync?since=..., поэтому пропущенное при переподключении событие ничего не теряет -
+# после "ready" клиент всегда синхронизируется
+STREAM_READY = "retry: 3000\nevent: ready\ndata: {}\n\n"
+STREAM_PING = ": ping\n\n"
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+
+def stream_event(entity: str) -> str:
+    return f"event: {entity}\ndata: {json.dumps({'entity': entity})}\n\n"
+
+
+class Subscriber:
+    # Событие - только имя сущности, которую пора перечитать через /sync, поэтому очередь
+    # не нужна: повторы схлопываются в множество, и медленный клиент не копит память
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._pending: Set[str] = set()
+        self._condition = threading.Condition()
+
+    def push(self, entity: str):
+        with self._condition:
+            self._pending.add(entity)
+            self._condition.notify()
+
+    def wait(self, timeout: float) -> Set[str]:
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            pending, self._pending = self._pending, set()
+        return pending
+
+
+class AsyncSubscriber:
+    # То же для ASGI-приложения: соединение ждёт asyncio.Event и не занимает поток. push
+    # вызывает задача опроса в том же цикле событий
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._pending: Set[str] = set()
+        self._event = asyncio.Event()
+
+    def push(self, entity: str):
+        self._pending.add(entity)
+        self._event.set()
+
+    async def wait(self, timeout: float) -> Set[str]:
+        if not self._pending:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._event.wait(), timeout)
+        self._event.clear()
+        pending, self._pending = self._pending, set()
+        return pending
+
+
+class LocalTransport:
+    # Один процесс: событие доставляется сразу в том же потоке, что его отправил
+    def __init__(self, app: Flask):
+        self.deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver, has_subscribers: Callable[[], bool]):
+        self.deliver = deliver
+
+    def publish(self, user_ids: Optional[Iterable[int]], entity: str):
+        if self.deliver is not None:
+            self.deliver(user_ids, entity)
+
+
+class DatabaseTransport:
+    # Несколько воркеров: события пишутся в таблицу LiveEvents, каждый процесс читает её одним
+    # запросом раз в poll_interval и раздаёт своим подписчикам. Пока подписчиков нет, таблица
+    # не опрашивается
+    def __init__(self, app: Flask):
+        self.app = app
+        self.poll_interval = app.config['LIVE_EVENTS_POLL_INTERVAL']
+        self.deliver: Optional[Deliver] = None
+        self.has_subscribers: Optional[Callable[[], bool]] = None
+        self._last_id: Optional[int] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self, deliver: Deliver, has_subscribers: Callable[[], bool]):
+        self.deliver = deliver
+        self.has_subscribers = has_subscribers
+        with self._lock:
+            # Позиция берётся до ответа клиенту: всё, что закоммичено после подписки, он получит
+            if self._last_id is None:
+                self._last_id = LiveEventRepository(db.session).last_event_id()
+            # Поток мастера не переживает fork, поэтому запускаем его в каждом процессе заново
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._poll, name='live-events-poller', daemon=True).start()
+
+    def publish(self, user_ids: Optional[Iterable[int]], entity: str):
+        LiveEventRepository(db.session).append(user_ids, entity)
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self.has_subscribers():
+                    self._last_id = None
+                    continue
+                last_id = self._last_id
+            with self.app.app_context():
+                try:
+                    events = LiveEventRepository(db.session).get_after(last_id)
+                except Exception:
+                    logger.exception("Live events poll failed")
+                    continue
+                finally:
+                    db.session.remove()
+            for event_id, user_id, entity in events:
+                self.deliver(None if user_id is None else (user_id,), entity)
+            if events:
+                with self._lock:
+                    if self._last_id is not None:
+                        self._last_id = events[-1].event_id
+
+
+class AsyncDatabaseTransport:
+    # Та же таблица LiveEvents для ASGI-приложения: её опрашивает задача цикла событий, а не поток.
+    # Публикуют события воркеры Flask, поэтому им нужен транспорт 'database'
+    def __init__(self, sessionmaker, poll_interval: float):
+        self.sessionmaker = sessionmaker
+        self.poll_interval = poll_interval
+        self.deliver: Optional[Deliver] = None
+        self.has_subscribers: Optional[Callable[[], bool]] = None
+        self._last_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, deliver: Deliver, has_subscribers: Callable[[], bool]):
+        self.deliver = deliver
+        self.has_subscribers = has_subscribers
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def ready(self):
+        # Позиция берётся до ответа клиенту: всё, что закоммичено после подписки, он получит
+        if self._last_id is None:
+            async with self.sessionmaker() as session:
+                last_id = await AsyncLiveEventRepository(session).last_event_id()
+            if self._last_id is None:
+                self._last_id = last_id
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self.has_subscribers():
+                self._last_id = None
+                continue
+            try:
+                if self._last_id is None:
+                    await self.ready()
+                    continue
+                async with self.sessionmaker() as session:
+                    events = await AsyncLiveEventRepository(session).get_after(self._last_id)
+            except Exception:
+                logger.exception("Live events poll failed")
+                continue
+            for event_id, user_id, entity in events:
+                self.deliver(None if user_id is None else (user_id,), entity)
+            if events and self._last_id is not None:
+                self._last_id = events[-1].event_id
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+TRANSPORTS = {
+    'local': LocalTransport,
+    'database': DatabaseTransport,
+}
+
+
+class EventBroker:
+    def __init__(self, transport, subscriber_class=Subscriber):
+        self.transport = transport
+        self.subscriber_class = subscriber_class
+        self._subscribers: Dict[int, Set[Subscriber]] = defaultdict(set)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int, limit: Optional[int] = None) -> Optional[Subscriber]:
+        subscriber = self.subscriber_class(user_id)
+        with self._lock:
+            if limit is not None and self._count >= limit:
+                return None
+            self._subscribers[user_id].add(subscriber)
+            self._count += 1
+        try:
+            self.transport.start(self.deliver, self.has_subscribers)
+        except Exception:
+            self.unsubscribe(subscriber)
+            raise
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers is None or subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.user_id]
+            self._count -= 1
+
+    def has_subscribers(self) -> bool:
+        return self._count > 0
+
+    def stream_count(self) -> int:
+        return self._count
+
+    def deliver(self, user_ids: Optional[Iterable[int]], entity: str):
+        with self._lock:
+            if user_ids is None:
+                targets = [subscriber for subscribers in self._subscribers.values() for subscriber in subscribers]
+            else:
+                targets = [subscriber for user_id in set(user_ids)
+                           for subscriber in self._subscribers.get(int(user_id), ())]
+        for subscriber in targets:
+            subscriber.push(entity)
+
+    def publish(self, user_ids: Optional[Iterable[int]], entity: str):
+        # Изменение уже закоммичено: сбой доставки не должен превращать запрос в ошибку
+        try:
+            self.transport.publish(user_ids, entity)
+        except Exception:
+            db.session.rollback()
+            logger.exception("Failed to publish live event %s", entity)
+            return
+        metrics.inc("live_events_published_total", (("entity", entity),))
+
+
+def _publisher(entity: str):
+    def publish(sender, user_ids=None):
+        broker = current_app.extensions.get('live_events')
+        if broker is not None:
+            broker.publish(user_ids, entity)
+
+    return publish
+
+
+_publish_lessons = _publisher('lessons')
+_publish_subscriptions = _publisher('subscriptions')
+
+
+class LiveEvents:
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        name = app.config['LIVE_EVENTS_TRANSPORT']
+        if name not in TRANSPORTS:
+            raise ValueError(f"Unknown LIVE_EVENTS_TRANSPORT '{name}', expected one of: {', '.join(TRANSPORTS)}")
+        broker = app.extensions['live_events'] = EventBroker(TRANSPORTS[name](app))
+
+        lessons_changed.connect(_publish_lessons)
+        subscriptions_changed.connect(_publish_subscriptions)
+        metrics.register_gauge_collector(lambda: [("live_event_streams", (), broker.stream_count())])
+
+    @property
+    def broker(self) -> EventBroker:
+        return current_app.extensions['live_events']
+
+
+live_events = LiveEvents()
@@ -0,0 +1,144 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from flask import Flask, g, has_request_context, request
+from flask.logging import default_handler
+
+from app.metrics import metrics
+
+# Значения ключей, в имени которых есть одно из этих слов, в лог не попадают
+SENSITIVE_KEYS = ('password', 'secret', 'token', 'authorization', 'cookie', 'csrf')
+REDACTED = '***'
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Чужой идентификатор принимаем, только если он похож на идентификатор, а не на попытку
+# подсунуть в лог произвольный текст
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+# Атрибуты, которые есть у любой LogRecord; всё остальное пришло через extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'request_id'}
+
+
+def _is_sensitive(key) -> bool:
+    key = str(key).lower()
+    return any(word in key for word in SENSITIVE_KEYS)
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {key: REDACTED if _is_sensitive(key) else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    return value
+
+
+class RequestContextFilter(logging.Filter):
+    # Выполняется в потоке запроса, до очереди: там ещё доступны g и аргументы записи
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = g.get('request_id') if has_request_context() else None
+        if isinstance(record.args, (dict, tuple)):
+            record.args = redact(record.args)
+        for key in set(vars(record)) - _RECORD_ATTRIBUTES:
+            setattr(record, key, REDACTED if _is_sensitive(key) else redact(getattr(record, key)))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, 'request_id', None),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BackgroundHandler(QueueHandler):
+    # Поток запроса только кладёт запись в очередь; форматирование в JSON и запись в поток
+    # вывода делает QueueListener. Переполненная очередь отбрасывает записи со счётчиком,
+    # а не блокирует запрос. Поток слушателя не переживает fork, поэтому при первой записи
+    # в новом процессе очередь и слушатель создаются заново
+    def __init__(self, target: logging.Handler, max_queue: int = 10000):
+        self.target = target
+        self.max_queue = max_queue
+        self.listener: Optional[QueueListener] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        super().__init__(queue.Queue(maxsize=max_queue))
+        self.addFilter(RequestContextFilter())
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.queue = queue.Queue(maxsize=self.max_queue)
+            self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+            self.listener.start()
+            atexit.register(self.stop)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # В отличие от QueueHandler.prepare, не склеиваем трейсбек с сообщением: он уходит
+        # отдельным полем JSON
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total")
+
+    def stop(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self._pid = None
+
+
+def _assign_request_id():
+    incoming = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+
+def _return_request_id(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def configure_logging(app: Flask):
+    root = logging.getLogger()
+    for handler in [handler for handler in root.handlers if isinstance(handler, BackgroundHandler)]:
+        root.removeHandler(handler)
+        handler.stop()
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter())
+    root.addHandler(BackgroundHandler(output, max_queue=app.config['LOG_QUEUE_SIZE']))
+    root.setLevel(app.config['LOG_LEVEL'])
+    # Все записи приложения идут через корневой логгер и его очередь
+    app.logger.removeHandler(default_handler)
+
+    app.before_request(_assign_request_id)
+    app.after_request(_return_request_id)
@@ -0,0 +1,296 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, g, request
+
+Labels = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    "http_requests_total": ("counter", "Total HTTP requests by blueprint, endpoint, method and status"),
+    "http_request_errors_total": ("counter", "HTTP requests that ended with a 5xx response"),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency in seconds"),
+    "app_cache_requests_total": ("counter", "Cache lookups by cache name and result"),
+    "app_cache_hit_ratio": ("gauge", "Cache hit ratio since process start"),
+    "db_pool_size": ("gauge", "Configured size of the SQLAlchemy connection pool"),
+    "db_pool_checked_out": ("gauge", "Connections currently checked out of the pool"),
+    "db_pool_checked_in": ("gauge", "Idle connections currently held by the pool"),
+    "db_pool_overflow": ("gauge", "Connections opened above the pool size"),
+    "jobs_processed_total": ("counter", "Background jobs processed by job name and outcome"),
+    "job_duration_seconds": ("histogram", "Background job run time in seconds"),
+    "jobs_queue_depth": ("gauge", "Background jobs in the queue by status"),
+    "http_rate_limited_total": ("counter", "Requests rejected by a per-client rate limiter"),
+    "live_events_published_total": ("counter", "Live change events published by entity"),
+    "live_event_streams": ("gauge", "Open /sync/stream connections"),
+    "audit_records_written_total": ("counter", "Audit log records written to the database"),
+    "audit_records_dropped_total": ("counter", "Audit log records lost to a full queue or a failed write"),
+    "log_records_dropped_total": ("counter", "Log records dropped because the logging queue was full"),
+    "reminders_sent_total": ("counter", "Lesson reminders handed to the notifier by recipient role"),
+    "email_index_lookups_total": ("counter", "Email index lookups: definitely_free skips the Users query, "
+                                             "maybe_taken is checked in the database"),
+}
+
+
+class _Shard:
+    # Пишет в шард только поток-владелец, поэтому на горячем пути блокировки не нужны
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self.histograms: Dict[Tuple[str, Labels], list] = {}
+
+
+class Metrics:
+    def __init__(self, app: Optional[Flask] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._gauge_collectors: List[Callable[[], Iterable[Tuple[str, Labels, float]]]] = []
+        self._shared_gauge_collectors: List[Callable[[], Iterable[Tuple[str, Labels, float]]]] = []
+        self._multiproc_dir: Optional[str] = None
+        self._flush_interval = 5.0
+        self._next_flush = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault("METRICS_ENABLED", True)
+        app.config.setdefault("METRICS_MULTIPROC_DIR", os.environ.get("METRICS_MULTIPROC_DIR"))
+        app.config.setdefault("METRICS_FLUSH_INTERVAL", 5.0)
+        app.extensions["metrics"] = self
+
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        self._multiproc_dir = app.config["METRICS_MULTIPROC_DIR"]
+        self._flush_interval = float(app.config["METRICS_FLUSH_INTERVAL"])
+        if self._multiproc_dir:
+            os.makedirs(self._multiproc_dir, exist_ok=True)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1.0):
+        self._shard().counters[(name, labels)] += amount
+
+    def observe(self, name: str, labels: Labels, value: float):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        entry = histograms.get(key)
+        if entry is None:
+            entry = histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def cache_hit(self, cache: str):
+        self.inc("app_cache_requests_total", (("cache", cache), ("result", "hit")))
+
+    def cache_miss(self, cache: str):
+        self.inc("app_cache_requests_total", (("cache", cache), ("result", "miss")))
+
+    def register_gauge_collector(self, collector: Callable[[], Iterable[Tuple[str, Labels, float]]],
+                                 per_process: bool = True):
+        # Общие для всех процессов значения (например, глубина очереди в БД) снимаются один раз
+        # при опросе, иначе при суммировании по воркерам они умножатся на их число
+        if per_process:
+            self._gauge_collectors.append(collector)
+        else:
+            self._shared_gauge_collectors.append(collector)
+
+    def _before_request(self):
+        g._metrics_started_at = time.perf_counter()
+
+    def _after_request(self, response):
+        started_at = g.pop("_metrics_started_at", None)
+        if started_at is None:
+            return response
+
+        elapsed = time.perf_counter() - started_at
+        blueprint = request.blueprint or ""
+        # Несопоставленные URL схлопываются в одну метку, чтобы сканеры не раздували кардинальность
+        endpoint = request.endpoint or "unmatched"
+        method = request.method
+
+        base = (("blueprint", blueprint), ("endpoint", endpoint), ("method", method))
+        self.inc("http_requests_total", base + (("status", str(response.status_code)),))
+        if response.status_code >= 500:
+            self.inc("http_request_errors_total", base)
+        self.observe("http_request_duration_seconds", base, elapsed)
+
+        if self._multiproc_dir and started_at >= self._next_flush:
+            self._next_flush = started_at + self._flush_interval
+            self.write_snapshot()
+        return response
+
+    def snapshot(self) -> dict:
+        counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        histograms: Dict[Tuple[str, Labels], list] = {}
+
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        for shard in shards:
+            for key, value in list(shard.counters.items()):
+                counters[key] += value
+            for key, (buckets, total, count) in list(shard.histograms.items()):
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+
+        return {"counters": counters, "histograms": histograms, "gauges": _collect_gauges(self._gauge_collectors)}
+
+    def write_snapshot(self):
+        if not self._multiproc_dir:
+            return
+        data = self.snapshot()
+        payload = {
+            "pid": os.getpid(),
+            "counters": [[name, list(labels), value] for (name, labels), value in data["counters"].items()],
+            "histograms": [[name, list(labels), entry] for (name, labels), entry in data["histograms"].items()],
+            "gauges": [[name, list(labels), value] for (name, labels), value in data["gauges"].items()],
+        }
+        path = os.path.join(self._multiproc_dir, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def collect(self) -> dict:
+        if not self._multiproc_dir:
+            return self.snapshot()
+
+        self.write_snapshot()
+        counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        histograms: Dict[Tuple[str, Labels], list] = {}
+        gauges: Dict[Tuple[str, Labels], float] = defaultdict(float)
+
+        for path in glob.glob(os.path.join(self._multiproc_dir, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            # Счётчики умерших воркеров сохраняются, иначе Prometheus увидит сброс
+            for name, labels, value in payload["counters"]:
+                counters[(name, tuple(map(tuple, labels)))] += value
+            for name, labels, (buckets, total, count) in payload["histograms"]:
+                merged = histograms.setdefault((name, tuple(map(tuple, labels))), [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+            if _pid_alive(payload["pid"]):
+                for name, labels, value in payload["gauges"]:
+                    gauges[(name, tuple(map(tuple, labels)))] += value
+
+        return {"counters": counters, "histograms": histograms, "gauges": gauges}
+
+    def render(self) -> str:
+        data = self.collect()
+        gauges = dict(data["gauges"])
+        gauges.update(_collect_gauges(self._shared_gauge_collectors))
+
+        cache_totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {"hit": 0.0, "miss": 0.0})
+        for (name, labels), value in data["counters"].items():
+            if name == "app_cache_requests_total":
+                label_map = dict(labels)
+                cache_totals[label_map["cache"]][label_map["result"]] += value
+        for cache, totals in cache_totals.items():
+            lookups = totals["hit"] + totals["miss"]
+            gauges[("app_cache_hit_ratio", (("cache", cache),))] = totals["hit"] / lookups if lookups else 0.0
+
+        series: Dict[str, List[str]] = defaultdict(list)
+        for (name, labels), value in sorted(data["counters"].items()):
+            series[name].append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), value in sorted(gauges.items()):
+            series[name].append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), (buckets, total, count) in sorted(data["histograms"].items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), buckets):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                series[name].append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            series[name].append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            series[name].append(f"{name}_count{_format_labels(labels)} {count}")
+
+        lines = []
+        for name in sorted(series):
+            metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(series[name])
+        return "\n".join(lines) + "\n"
+
+
+def pool_gauges(engine_getter: Callable):
+    def collect():
+        pool = engine_getter().pool
+        for name, method in (
+            ("db_pool_size", "size"),
+            ("db_pool_checked_out", "checkedout"),
+            ("db_pool_checked_in", "checkedin"),
+            ("db_pool_overflow", "overflow"),
+        ):
+            if hasattr(pool, method):
+                yield name, (), getattr(pool, method)()
+
+    return collect
+
+
+def _collect_gauges(collectors) -> Dict[Tuple[str, Labels], float]:
+    gauges = {}
+    for collector in collectors:
+        try:
+            for name, labels, value in collector():
+                gauges[(name, tuple(labels))] = value
+        except Exception:
+            continue
+    return gauges
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+metrics = Metrics()
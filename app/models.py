@@ -3,7 +3,8 @@ from typing import Optional
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, ForeignKey, DateTime, Date, Text, Integer, MetaData, Enum, Time
+from sqlalchemy import String, ForeignKey, DateTime, Date, Text, Integer, BigInteger, MetaData, Enum, Time, Index
+from sqlalchemy.dialects import mysql
 from datetime import datetime, date, time
 from app.db import Base
 
@@ -37,6 +38,7 @@ class Classroom(Base):
 
     branch: Mapped["Branch"] = relationship(back_populates="classrooms")
     administrator: Mapped["Administrator"] = relationship(back_populates="classrooms")
+    lessons: Mapped[list["Lesson"]] = relationship(back_populates="classroom")
 
 class Discipline(Base):
     __tablename__ = "Disciplines"
@@ -60,6 +62,9 @@ class Discipline(Base):
 
 class TeacherDisciplineAssociation(Base):
     __tablename__ = "Teachers_has_Disciplines"
+    __table_args__ = (
+        Index("ix_Teachers_has_Disciplines_teacher_id_updated_at", "teacher_id", "updated_at"),
+    )
 
     teacher_id: Mapped[int] = mapped_column(
         ForeignKey("Teachers.user_id"),
@@ -69,6 +74,7 @@ class TeacherDisciplineAssociation(Base):
         ForeignKey("Disciplines.discipline_id"),
         primary_key=True
     )
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
 
     teacher: Mapped["Teacher"] = relationship(back_populates="discipline_associations")
     discipline: Mapped["Discipline"] = relationship(back_populates="teacher_associations")
@@ -77,12 +83,19 @@ class TeacherDisciplineAssociation(Base):
 
 class Subscription(Base):
     __tablename__ = "Subscriptions"
+    __table_args__ = (
+        Index("ix_Subscriptions_in_archive_end_date", "in_archive", "end_date"),
+        # Синхронизация: изменения одного учителя или ученика по времени
+        Index("ix_Subscriptions_teacher_id_updated_at", "teacher_id", "updated_at"),
+        Index("ix_Subscriptions_student_id_updated_at", "student_id", "updated_at"),
+    )
 
     subscription_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     total_lessons: Mapped[int] = mapped_column()
     start_date: Mapped[date] = mapped_column()
     end_date: Mapped[date] = mapped_column()
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
     in_archive: Mapped[bool] = mapped_column(default=False)
 
     student_id: Mapped[int] = mapped_column(ForeignKey("Students.user_id"))
@@ -95,6 +108,17 @@ class Subscription(Base):
 
 class Lesson(Base):
     __tablename__ = "Lessons"
+    __table_args__ = (
+        Index("ix_Lessons_status_lesson_date_time", "status", "lesson_date_time"),
+        # Подсчёт списанных уроков абонемента читает только индекс
+        Index("ix_Lessons_subscription_id_status", "subscription_id", "status"),
+        # Календарь: диапазон по времени в пределах одного учителя или ученика
+        Index("ix_Lessons_teacher_id_lesson_date_time", "teacher_id", "lesson_date_time"),
+        Index("ix_Lessons_student_id_lesson_date_time", "student_id", "lesson_date_time"),
+        Index("ix_Lessons_classroom_id_lesson_date_time", "classroom_id", "lesson_date_time"),
+        Index("ix_Lessons_teacher_id_updated_at", "teacher_id", "updated_at"),
+        Index("ix_Lessons_student_id_updated_at", "student_id", "updated_at"),
+    )
 
     lesson_id: Mapped[int] = mapped_column(primary_key=True)
     lesson_date_time: Mapped[datetime] = mapped_column()
@@ -102,6 +126,7 @@ class Lesson(Base):
     status: Mapped[str] = mapped_column(
         Enum('scheduled', 'completed', 'cancelled_in_time', 'missed', name='lesson_status'))
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
     online_call_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     subscription_id: Mapped[int | None] = mapped_column(
@@ -110,14 +135,24 @@ class Lesson(Base):
     )
     teacher_id: Mapped[int] = mapped_column(ForeignKey("Teachers.user_id"))
     student_id: Mapped[int] = mapped_column(ForeignKey("Students.user_id"))
+    # Только для очных уроков; назначается движком распределения аудиторий
+    classroom_id: Mapped[int | None] = mapped_column(
+        ForeignKey("Classrooms.classroom_id"),
+        nullable=True
+    )
 
     subscription: Mapped["Subscription"] = relationship(back_populates="lessons")
     teacher: Mapped["Teacher"] = relationship()
     student: Mapped["Student"] = relationship()
+    classroom: Mapped["Classroom"] = relationship(back_populates="lessons")
 
 
 class User(Base):
     __tablename__ = "Users"
+    __table_args__ = (
+        # Индексы email в воркерах догружают адреса, изменённые после известной им версии
+        Index("ix_Users_email_version", "email_version"),
+    )
 
     user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     full_name: Mapped[str] = mapped_column(String(100))
@@ -130,6 +165,10 @@ class User(Base):
     phone_number: Mapped[str] = mapped_column(String(20))
     profile_picture_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
     unique_code: Mapped[str] = mapped_column(String(255), unique=True)
+    # Входит в подпись ссылки на iCal-фид: увеличение отзывает все выданные ссылки
+    calendar_feed_version: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Значение счётчика Sequences 'user_emails' на момент последней записи email
+    email_version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
 
     student: Mapped["Student"] = relationship(back_populates="user", uselist=False)
     teacher: Mapped["Teacher"] = relationship(back_populates="user", uselist=False)
@@ -138,6 +177,10 @@ class User(Base):
 
 class StudentTeacherAssociation(Base):
     __tablename__ = "Students_has_Teachers"
+    __table_args__ = (
+        Index("ix_Students_has_Teachers_student_user_id_updated_at", "student_user_id", "updated_at"),
+        Index("ix_Students_has_Teachers_teacher_user_id_updated_at", "teacher_user_id", "updated_at"),
+    )
 
     student_user_id: Mapped[int] = mapped_column(
         ForeignKey("Students.user_id"),
@@ -147,6 +190,7 @@ class StudentTeacherAssociation(Base):
         ForeignKey("Teachers.user_id"),
         primary_key=True
     )
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
 
     student: Mapped["Student"] = relationship(backref="teacher_associations")
     teacher: Mapped["Teacher"] = relationship(backref="student_associations")
@@ -211,3 +255,108 @@ class Administrator(Base):
     branches: Mapped[list["Branch"]] = relationship(back_populates="administrator")
     classrooms: Mapped[list["Classroom"]] = relationship(back_populates="administrator")
 
+
+class Job(Base):
+    __tablename__ = "Jobs"
+    __table_args__ = (
+        Index("ix_Jobs_status_run_at", "status", "run_at"),
+    )
+
+    job_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100))
+    payload: Mapped[str] = mapped_column(Text)  # JSON
+    status: Mapped[str] = mapped_column(
+        Enum('queued', 'running', 'succeeded', 'failed', name='job_status'), default='queued')
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5)
+    run_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    locked_by: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Ключ периодического запуска: уникальность не даёт двум воркерам поставить один слот дважды
+    dedupe_key: Mapped[str | None] = mapped_column(String(191), unique=True, nullable=True)
+
+class CodeSequence(Base):
+    __tablename__ = "Sequences"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # Следующее ещё не выданное значение; процессы резервируют у него блоки.
+    # У счётчиков изменений (SequenceRepository.bump) - номер последнего изменения
+    next_value: Mapped[int] = mapped_column(BigInteger, default=0)
+    # Ключ перестановки, которой значения превращаются в коды; создаётся вместе со строкой.
+    # У счётчиков изменений пустой
+    secret: Mapped[str] = mapped_column(String(64))
+
+
+class Tombstone(Base):
+    __tablename__ = "Tombstones"
+    __table_args__ = (
+        Index("ix_Tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+
+    tombstone_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Имя сущности в ответе /sync и её ключ: "15" или "3:7" для таблиц связей
+    entity: Mapped[str] = mapped_column(String(30))
+    entity_key: Mapped[str] = mapped_column(String(50))
+    # Кому отдать удаление; без внешнего ключа - запись переживает удаление пользователя
+    user_id: Mapped[int] = mapped_column(Integer)
+    deleted_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
+class LiveEvent(Base):
+    __tablename__ = "LiveEvents"
+    __table_args__ = (
+        Index("ix_LiveEvents_created_at", "created_at"),
+    )
+
+    event_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Кому доставить; NULL - всем подключённым (затронутые пользователи неизвестны)
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Имя сущности из /sync, которую клиенту пора перечитать
+    entity: Mapped[str] = mapped_column(String(30))
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
+class AuditRecord(Base):
+    __tablename__ = "AuditLog"
+    __table_args__ = (
+        # Выборки журнала идут от новых к старым: по времени, по автору или по сущности
+        Index("ix_AuditLog_created_at", "created_at"),
+        Index("ix_AuditLog_actor_id_created_at", "actor_id", "created_at"),
+        Index("ix_AuditLog_entity_entity_key_created_at", "entity", "entity_key", "created_at"),
+    )
+
+    audit_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True,
+                                          autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    # Кто изменил; NULL - фоновая задача или CLI. Без внешнего ключа - запись переживает удаление автора
+    actor_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    action: Mapped[str] = mapped_column(String(20))  # create, update, delete
+    entity: Mapped[str] = mapped_column(String(30))
+    entity_key: Mapped[str] = mapped_column(String(50))
+    # JSON: {"поле": [было, стало]} для update, {"поле": значение} для create и delete
+    changes: Mapped[str] = mapped_column(Text)
+    endpoint: Mapped[str | None] = mapped_column(String(100), nullable=True)
+
+
+class UserImport(Base):
+    __tablename__ = "UserImports"
+    __table_args__ = (
+        Index("ix_UserImports_created_at", "created_at"),
+    )
+
+    import_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Без внешних ключей, как в журнале аудита: отчёт переживает удаление администратора
+    administrator_id: Mapped[int] = mapped_column(Integer)
+    teacher_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    status: Mapped[str] = mapped_column(
+        Enum('queued', 'running', 'done', 'failed', name='user_import_status'), default='queued')
+    # Исходный CSV с паролями открытым текстом: стирается, как только импорт завершён
+    source: Mapped[str | None] = mapped_column(Text().with_variant(mysql.MEDIUMTEXT(), "mysql"), nullable=True)
+    # JSON-отчёт UserImporter.run
+    report: Mapped[str | None] = mapped_column(Text().with_variant(mysql.MEDIUMTEXT(), "mysql"), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(nullable=True)
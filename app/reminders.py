@@ -0,0 +1,147 @@
+import logging
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from flask import Flask
+
+from app.db import db
+from app.metrics import metrics
+from app.repositories.lesson_repository import LessonRepository
+from app.utils.reminder_scheduler import DueReminder, ReminderScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Reminder(NamedTuple):
+    user_id: int
+    role: str
+    lesson_id: int
+    lesson_date_time: datetime
+    minutes_before: int
+
+
+class LogNotifier:
+    # Локальная заглушка: настоящая доставка (почта, push) подключается через NOTIFIERS
+    def __init__(self, app: Flask):
+        pass
+
+    def notify(self, reminders: List[Reminder]):
+        for reminder in reminders:
+            logger.info("Reminder for %s %s: lesson %s at %s (in %s min)", reminder.role, reminder.user_id,
+                        reminder.lesson_id, reminder.lesson_date_time.isoformat(), reminder.minutes_before)
+
+
+NOTIFIERS = {
+    'log': LogNotifier,
+}
+
+
+class ReminderService:
+    # Окно ближайших уроков держится в памяти. Раз в refresh_interval подгружается новый срез
+    # окна и уроки, созданные или перенесённые внутри уже загруженного (по updated_at).
+    # Перед отправкой урок перечитывается: отменённые и перенесённые отсеиваются, даже если
+    # обновление окна их ещё не увидело
+    def __init__(self, app: Flask, notifier=None):
+        config = app.config
+        self.app = app
+        self.scheduler = ReminderScheduler([timedelta(minutes=minutes)
+                                            for minutes in config['REMINDER_OFFSETS_MINUTES']])
+        self.refresh_interval = timedelta(seconds=config['REMINDERS_REFRESH_INTERVAL'])
+        # Напоминание за самое большое смещение должно быть в памяти до следующего обновления
+        self.lookahead = self.scheduler.offsets[0] + 2 * self.refresh_interval
+        name = config['REMINDERS_NOTIFIER']
+        if notifier is None:
+            if name not in NOTIFIERS:
+                raise ValueError(f"Unknown REMINDERS_NOTIFIER '{name}', expected one of: {', '.join(NOTIFIERS)}")
+            notifier = NOTIFIERS[name](app)
+        self.notifier = notifier
+        self.loaded_until: Optional[datetime] = None
+        self.changed_since: Optional[datetime] = None
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        # Время уроков - локальное (datetime.now), updated_at - UTC
+        now = now or datetime.now()
+        started = datetime.utcnow()
+        repository = LessonRepository(db.session)
+        end = now + self.lookahead
+        loaded = 0
+        if self.loaded_until is None:
+            self.loaded_until = now
+        else:
+            # Запас в несколько секунд: транзакция могла закоммититься позже, чем записала updated_at
+            for row in repository.get_reminder_lessons(now, self.loaded_until,
+                                                       self.changed_since - timedelta(seconds=5)):
+                loaded += self.scheduler.schedule(*row, now=now, catch_up=True)
+        # Новый срез окна: первые напоминания его уроков ещё впереди, догонять нечего
+        for row in repository.get_reminder_lessons(max(self.loaded_until, now), end):
+            loaded += self.scheduler.schedule(*row, now=now)
+        self.loaded_until = end
+        self.changed_since = started
+        self.scheduler.prune(now)
+        return loaded
+
+    def fire_due(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        due = self.scheduler.pop_due(now)
+        if not due:
+            return 0
+        states = LessonRepository(db.session).get_lesson_states(sorted({item.lesson_id for item in due}))
+        reminders = []
+        for item in due:
+            state = states.get(item.lesson_id)
+            if state is None or state.status != 'scheduled':
+                self.scheduler.cancel(item.lesson_id)
+                continue
+            if state.lesson_date_time != item.lesson_date_time:
+                self.scheduler.schedule(state.lesson_id, state.lesson_date_time, state.teacher_id,
+                                        state.student_id, now=now, catch_up=True)
+                continue
+            reminders.extend(self._reminders(item, state))
+        if reminders:
+            self.notifier.notify(reminders)
+            for reminder in reminders:
+                metrics.inc("reminders_sent_total", (("role", reminder.role),))
+        return len(reminders)
+
+    @staticmethod
+    def _reminders(item: DueReminder, state) -> List[Reminder]:
+        minutes = int(item.offset.total_seconds() // 60)
+        return [
+            Reminder(state.teacher_id, 'teacher', item.lesson_id, item.lesson_date_time, minutes),
+            Reminder(state.student_id, 'student', item.lesson_id, item.lesson_date_time, minutes),
+        ]
+
+    def run(self, once: bool = False):
+        stopping = []
+
+        def stop(signum, frame):
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        next_refresh = datetime.now()
+        logger.info("Reminder service started, offsets: %s",
+                    ", ".join(str(offset) for offset in self.scheduler.offsets))
+        while not stopping:
+            with self.app.app_context():
+                try:
+                    if datetime.now() >= next_refresh:
+                        loaded = self.refresh()
+                        next_refresh = datetime.now() + self.refresh_interval
+                        logger.debug("Reminder window: %s lessons, %s new", len(self.scheduler), loaded)
+                    self.fire_due()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Reminder service iteration failed")
+                finally:
+                    metrics.write_snapshot()
+                    db.session.remove()
+            if once:
+                break
+            wake_at = min(filter(None, (self.scheduler.next_fire_at(), next_refresh)))
+            # Сон кусками по секунде, чтобы быстро реагировать на SIGTERM
+            time.sleep(min(1.0, max(0.0, (wake_at - datetime.now()).total_seconds())))
+        logger.info("Reminder service stopped")
@@ -5,4 +5,10 @@ from .subscription_repository import SubscriptionRepository
 from .lesson_repository import LessonRepository
 from .discipline_repository import DisciplineRepository
 from .branch_repository import BranchRepository
-from .classroom_repository import ClassroomRepository
\ No newline at end of file
+from .classroom_repository import ClassroomRepository
+from .job_repository import JobRepository
+from .sequence_repository import SequenceRepository
+from .sync_repository import SyncRepository
+from .live_event_repository import LiveEventRepository
+from .audit_repository import AuditRepository
+from .user_import_repository import UserImportRepository
@@ -0,0 +1,6 @@
+from .user_repository import AsyncUserRepository
+from .role_repository import AsyncRoleRepository
+from .association_teacher_student_repository import AsyncAssociationTeacherStudentRepository
+from .subscription_repository import AsyncSubscriptionRepository
+from .lesson_repository import AsyncLessonRepository
+from .live_event_repository import AsyncLiveEventRepository
@@ -0,0 +1,27 @@
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.models import StudentTeacherAssociation, Student, Teacher
+
+
+class AsyncAssociationTeacherStudentRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    # AsyncSession не умеет ленивую загрузку, поэтому user подгружается сразу
+    async def get_teachers_for_student(self, student_id: int) -> List[Teacher]:
+        return (await self.session.execute(
+            select(Teacher)
+            .join(StudentTeacherAssociation, Teacher.user_id == StudentTeacherAssociation.teacher_user_id)
+            .where(StudentTeacherAssociation.student_user_id == student_id)
+            .options(joinedload(Teacher.user))
+        )).scalars().all()
+
+    async def get_students_for_teacher(self, teacher_id: int) -> List[Student]:
+        return (await self.session.execute(
+            select(Student)
+            .join(StudentTeacherAssociation, Student.user_id == StudentTeacherAssociation.student_user_id)
+            .where(StudentTeacherAssociation.teacher_user_id == teacher_id)
+            .options(joinedload(Student.user))
+        )).scalars().all()
@@ -0,0 +1,37 @@
+from typing import List
+from datetime import datetime
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Lesson
+
+
+class AsyncLessonRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_lessons_by_subscription(self, subscription_id: int) -> List[Lesson]:
+        return (await self.session.execute(
+            select(Lesson)
+            .where(Lesson.subscription_id == subscription_id)
+            .order_by(Lesson.lesson_date_time)
+        )).scalars().all()
+
+    async def get_upcoming_lessons(self, user_id: int, user_type: str, limit: int = 10) -> List[Lesson]:
+        now = datetime.now()
+        if user_type == 'student':
+            condition = Lesson.student_id == user_id
+        elif user_type == 'teacher':
+            condition = Lesson.teacher_id == user_id
+        else:
+            raise ValueError("Invalid user type. Use 'student' or 'teacher'")
+
+        return (await self.session.execute(
+            select(Lesson)
+            .where(and_(
+                condition,
+                Lesson.lesson_date_time >= now,
+                Lesson.status == 'scheduled'
+            ))
+            .order_by(Lesson.lesson_date_time)
+            .limit(limit)
+        )).scalars().all()
@@ -0,0 +1,20 @@
+from typing import List
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import LiveEvent
+
+
+class AsyncLiveEventRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def last_event_id(self) -> int:
+        return (await self.session.execute(select(func.max(LiveEvent.event_id)))).scalar() or 0
+
+    async def get_after(self, event_id: int, limit: int = 1000) -> List:
+        return (await self.session.execute(
+            select(LiveEvent.event_id, LiveEvent.user_id, LiveEvent.entity)
+            .where(LiveEvent.event_id > event_id)
+            .order_by(LiveEvent.event_id)
+            .limit(limit)
+        )).all()
@@ -0,0 +1,20 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Student, Teacher, Parent, Administrator
+
+
+class AsyncRoleRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_student_by_user_id(self, user_id: int) -> Optional[Student]:
+        return await self.session.get(Student, user_id)
+
+    async def get_teacher_by_user_id(self, user_id: int) -> Optional[Teacher]:
+        return await self.session.get(Teacher, user_id)
+
+    async def get_parent_by_user_id(self, user_id: int) -> Optional[Parent]:
+        return await self.session.get(Parent, user_id)
+
+    async def get_administrator_by_user_id(self, user_id: int) -> Optional[Administrator]:
+        return await self.session.get(Administrator, user_id)
@@ -0,0 +1,39 @@
+from typing import List
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import Subscription, Student, Teacher
+
+
+class AsyncSubscriptionRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_subscriptions_for_student(self, student_id: int) -> List[Subscription]:
+        return (await self.session.execute(
+            select(Subscription)
+            .where(Subscription.student_id == student_id)
+        )).scalars().all()
+
+    async def get_subscriptions_for_teacher(self, teacher_id: int, with_lessons: bool = False) -> List[Subscription]:
+        query = (
+            select(Subscription)
+            .where(Subscription.teacher_id == teacher_id)
+            .options(
+                joinedload(Subscription.student).joinedload(Student.user),
+                joinedload(Subscription.teacher).joinedload(Teacher.user),
+            )
+        )
+        if with_lessons:
+            query = query.options(selectinload(Subscription.lessons))
+        return (await self.session.execute(query)).unique().scalars().all()
+
+    async def get_active_subscriptions(self, student_id: int, teacher_id: int) -> List[Subscription]:
+        return (await self.session.execute(
+            select(Subscription)
+            .where(and_(
+                Subscription.student_id == student_id,
+                Subscription.teacher_id == teacher_id,
+                Subscription.in_archive == False
+            ))
+        )).scalars().all()
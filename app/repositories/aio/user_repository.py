@@ -0,0 +1,17 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import User
+
+
+class AsyncUserRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        return await self.session.get(User, user_id)
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        return (await self.session.execute(
+            select(User).where(User.email == email)
+        )).scalar_one_or_none()
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import select, and_, or_
+from sqlalchemy.orm import Session
+from app.models import AuditRecord
+
+
+class AuditRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_records(
+            self,
+            actor_id: Optional[int] = None,
+            entity: Optional[str] = None,
+            entity_key: Optional[str] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            before: Optional[Tuple[datetime, int]] = None,
+            limit: int = 50
+    ) -> List[AuditRecord]:
+        # От новых к старым по (created_at, audit_id); before - последняя запись прошлой страницы.
+        # Фильтр по автору или сущности идёт по своему индексу (..., created_at), без OFFSET
+        query = select(AuditRecord)
+        if actor_id is not None:
+            query = query.where(AuditRecord.actor_id == actor_id)
+        if entity is not None:
+            query = query.where(AuditRecord.entity == entity)
+            if entity_key is not None:
+                query = query.where(AuditRecord.entity_key == entity_key)
+        if since is not None:
+            query = query.where(AuditRecord.created_at >= since)
+        if until is not None:
+            query = query.where(AuditRecord.created_at < until)
+        if before is not None:
+            created_at, audit_id = before
+            query = query.where(or_(
+                AuditRecord.created_at < created_at,
+                and_(AuditRecord.created_at == created_at, AuditRecord.audit_id < audit_id)
+            ))
+        return self.session.execute(
+            query
+            .order_by(AuditRecord.created_at.desc(), AuditRecord.audit_id.desc())
+            .limit(limit + 1)
+        ).scalars().all()
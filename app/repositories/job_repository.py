@@ -0,0 +1,138 @@
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.models import Job
+
+
+class JobRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_job_by_id(self, job_id: int) -> Optional[Job]:
+        return self.session.execute(
+            select(Job)
+            .where(Job.job_id == job_id)
+        ).scalar_one_or_none()
+
+    def enqueue(
+            self,
+            name: str,
+            payload: Optional[dict] = None,
+            run_at: Optional[datetime] = None,
+            max_attempts: int = 5,
+            dedupe_key: Optional[str] = None
+    ) -> Optional[Job]:
+        now = datetime.utcnow()
+        job = Job(
+            name=name,
+            payload=json.dumps(payload or {}),
+            status='queued',
+            attempts=0,
+            max_attempts=max_attempts,
+            run_at=run_at or now,
+            created_at=now,
+            dedupe_key=dedupe_key
+        )
+        # Точка сохранения, а не commit: задача вставляется в транзакцию вызывающего и
+        # появится в очереди вместе с его изменениями. Дубликат откатывает только её.
+        # Собственные изменения вызывающего сбрасываются до неё, чтобы их ошибки не выдали за дубликат
+        self.session.flush()
+        try:
+            with self.session.begin_nested():
+                self.session.add(job)
+            return job
+        except IntegrityError as e:
+            # Задача с таким ключом уже поставлена другим процессом
+            if dedupe_key is not None:
+                return None
+            raise ValueError(f"Ошибка при постановке задачи в очередь: {str(e)}")
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[Job]:
+        now = datetime.utcnow()
+        # SKIP LOCKED не даёт воркерам ждать друг друга на одних строках (MySQL 8+);
+        # SQLite игнорирует FOR UPDATE, там гонку закрывает условный UPDATE ниже
+        candidate_ids = self.session.execute(
+            select(Job.job_id)
+            .where(Job.status == 'queued', Job.run_at <= now)
+            .order_by(Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        claimed_ids = []
+        for job_id in candidate_ids:
+            result = self.session.execute(
+                update(Job)
+                .where(Job.job_id == job_id, Job.status == 'queued')
+                .values(status='running', locked_by=worker_id, started_at=now, attempts=Job.attempts + 1)
+            )
+            if result.rowcount == 1:
+                claimed_ids.append(job_id)
+        self.session.commit()
+
+        if not claimed_ids:
+            return []
+        return self.session.execute(
+            select(Job)
+            .where(Job.job_id.in_(claimed_ids))
+            .order_by(Job.run_at)
+        ).scalars().all()
+
+    def mark_succeeded(self, job_id: int):
+        self.session.execute(
+            update(Job)
+            .where(Job.job_id == job_id)
+            .values(status='succeeded', finished_at=datetime.utcnow(), locked_by=None, last_error=None)
+        )
+        self.session.commit()
+
+    def mark_failed(self, job_id: int, error: str, retry_in: Optional[timedelta]) -> str:
+        now = datetime.utcnow()
+        if retry_in is None:
+            values = {'status': 'failed', 'finished_at': now}
+        else:
+            values = {'status': 'queued', 'run_at': now + retry_in}
+        self.session.execute(
+            update(Job)
+            .where(Job.job_id == job_id)
+            .values(locked_by=None, last_error=error, **values)
+        )
+        self.session.commit()
+        return values['status']
+
+    def requeue_stale(self, timeout: timedelta) -> Tuple[int, int]:
+        # Воркер умер посреди задачи: возвращаем её в очередь, попытка уже засчитана.
+        # Если попытки кончились, задача завершается ошибкой, иначе падающий воркер крутил бы её вечно
+        now = datetime.utcnow()
+        stale = (Job.status == 'running', Job.started_at < now - timeout)
+        requeued = self.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts < Job.max_attempts)
+            .values(status='queued', locked_by=None)
+        ).rowcount
+        failed = self.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts >= Job.max_attempts)
+            .values(status='failed', locked_by=None, finished_at=now,
+                    last_error=f"Worker did not finish the job within {int(timeout.total_seconds())} s")
+        ).rowcount
+        self.session.commit()
+        return requeued, failed
+
+    def queue_depth(self) -> Dict[str, int]:
+        rows = self.session.execute(
+            select(Job.status, func.count())
+            .group_by(Job.status)
+        ).all()
+        return {status: count for status, count in rows}
+
+    def purge_finished(self, older_than: timedelta) -> int:
+        result = self.session.execute(
+            delete(Job)
+            .where(Job.status.in_(('succeeded', 'failed')), Job.finished_at < datetime.utcnow() - older_than)
+        )
+        self.session.commit()
+        return result.rowcount
@@ -1,9 +1,14 @@
-from typing import List, Optional
-from datetime import datetime
-from sqlalchemy import select, and_, or_
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, and_, or_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.models import Lesson, Subscription, Student, Teacher
+from app.models import Lesson, Subscription, Student, Teacher, User
+from app.repositories.subscription_repository import SubscriptionRepository, CONSUMED_LESSON_STATUSES
+from app.signals import lessons_changed, subscriptions_changed
+
+LESSON_STATUSES = tuple(Lesson.__table__.c.status.type.enums)
 
 
 class LessonRepository:
@@ -60,6 +65,90 @@ class LessonRepository:
             .limit(limit)
         ).scalars().all()
 
+    def get_lessons_in_range(
+            self,
+            user_id: int,
+            user_type: str,
+            start: datetime,
+            end: datetime,
+            statuses: Optional[List[str]] = None
+    ) -> List[Lesson]:
+        # Полуинтервал [start, end): соседние недели не пересекаются
+        if user_type == 'student':
+            owner = Lesson.student_id
+        elif user_type == 'teacher':
+            owner = Lesson.teacher_id
+        else:
+            raise ValueError("Invalid user type. Use 'student' or 'teacher'")
+
+        query = (
+            select(Lesson)
+            .where(owner == user_id, Lesson.lesson_date_time >= start, Lesson.lesson_date_time < end)
+            .order_by(Lesson.lesson_date_time)
+        )
+        if statuses:
+            query = query.where(Lesson.status.in_(statuses))
+        return self.session.execute(query).scalars().all()
+
+    def get_busy_intervals(self, teacher_id: int, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        # Урок, начавшийся накануне, может заходить в диапазон, поэтому нижняя граница сдвинута на сутки
+        rows = self.session.execute(
+            select(Lesson.lesson_date_time, Lesson.duration)
+            .where(
+                Lesson.teacher_id == teacher_id,
+                Lesson.lesson_date_time >= start - timedelta(days=1),
+                Lesson.lesson_date_time < end,
+                Lesson.status != 'cancelled_in_time'
+            )
+            .order_by(Lesson.lesson_date_time)
+        ).all()
+        return [(starts_at, starts_at + timedelta(minutes=duration)) for starts_at, duration in rows]
+
+    def get_calendar_feed(self, user_id: int, user_type: str, since: datetime):
+        # Только нужные фиду колонки и имя второй стороны одним JOIN; строки читаются потоком
+        if user_type == 'student':
+            owner, counterpart = Lesson.student_id, Lesson.teacher_id
+        elif user_type == 'teacher':
+            owner, counterpart = Lesson.teacher_id, Lesson.student_id
+        else:
+            raise ValueError("Invalid user type. Use 'student' or 'teacher'")
+
+        return self.session.execute(
+            select(
+                Lesson.lesson_id,
+                Lesson.lesson_date_time,
+                Lesson.duration,
+                Lesson.status,
+                Lesson.online_call_url,
+                Lesson.created_at,
+                Lesson.updated_at,
+                User.full_name.label('counterpart_name')
+            )
+            .join(User, User.user_id == counterpart)
+            .where(owner == user_id, Lesson.lesson_date_time >= since)
+            .order_by(Lesson.lesson_date_time)
+            .execution_options(yield_per=500)
+        )
+
+    def get_reminder_lessons(self, start: datetime, end: datetime, changed_since: Optional[datetime] = None) -> List:
+        # Диапазон по индексу (status, lesson_date_time); changed_since - только добавленные
+        # и перенесённые с прошлой выборки
+        query = (
+            select(Lesson.lesson_id, Lesson.lesson_date_time, Lesson.teacher_id, Lesson.student_id)
+            .where(Lesson.status == 'scheduled', Lesson.lesson_date_time >= start, Lesson.lesson_date_time < end)
+        )
+        if changed_since is not None:
+            query = query.where(Lesson.updated_at > changed_since)
+        return self.session.execute(query).all()
+
+    def get_lesson_states(self, lesson_ids: List[int]) -> Dict[int, tuple]:
+        if not lesson_ids:
+            return {}
+        return {row.lesson_id: row for row in self.session.execute(
+            select(Lesson.lesson_id, Lesson.lesson_date_time, Lesson.status, Lesson.teacher_id, Lesson.student_id)
+            .where(Lesson.lesson_id.in_(lesson_ids))
+        )}
+
     def create_lesson(
             self,
             lesson_date_time: datetime,
@@ -68,7 +157,8 @@ class LessonRepository:
             teacher_id: int,
             student_id: int,
             subscription_id: Optional[int] = None,
-            online_call_url: Optional[str] = None
+            online_call_url: Optional[str] = None,
+            classroom_id: Optional[int] = None
     ) -> Lesson:
         try:
             lesson = Lesson(
@@ -79,10 +169,12 @@ class LessonRepository:
                 student_id=student_id,
                 subscription_id=subscription_id,
                 online_call_url=online_call_url,
+                classroom_id=classroom_id,
                 created_at=datetime.now()
             )
             self.session.add(lesson)
             self.session.commit()
+            lessons_changed.send(self, user_ids={teacher_id, student_id})
             return lesson
         except IntegrityError as e:
             self.session.rollback()
@@ -113,7 +205,9 @@ class LessonRepository:
             if subscription_id is not None:
                 lesson.subscription_id = subscription_id
 
+            user_ids = {lesson.teacher_id, lesson.student_id}
             self.session.commit()
+            lessons_changed.send(self, user_ids=user_ids)
             return lesson
         except IntegrityError as e:
             self.session.rollback()
@@ -122,8 +216,10 @@ class LessonRepository:
     def delete_lesson(self, lesson_id: int) -> bool:
         lesson = self.get_lesson_by_id(lesson_id)
         if lesson:
+            user_ids = {lesson.teacher_id, lesson.student_id}
             self.session.delete(lesson)
             self.session.commit()
+            lessons_changed.send(self, user_ids=user_ids)
             return True
         return False
 
@@ -137,4 +233,114 @@ class LessonRepository:
         return self.update_lesson(
             lesson_id,
             status='completed'
-        )
\ No newline at end of file
+        )
+
+    def finish_past_lessons(
+            self,
+            before: Optional[datetime] = None,
+            status: str = 'completed',
+            chunk_size: int = 20000
+    ) -> dict:
+        if status not in CONSUMED_LESSON_STATUSES:
+            raise ValueError(f"Недопустимый итоговый статус урока: {status}")
+        before = before or datetime.now()
+        subscriptions = SubscriptionRepository(self.session)
+        totals = {'lessons': 0, 'archived_subscriptions': 0, 'archived_subscription_ids': []}
+
+        while True:
+            # Пачка задаётся диапазоном по индексу (status, lesson_date_time), а не списком id:
+            # UPDATE с длинным IN планировщик может повести по тому же индексу статуса и просканировать
+            # все запланированные уроки. Обновлённые строки выпадают из индекса, поэтому следующая
+            # пачка снова начинается с начала диапазона
+            pending = and_(Lesson.status == 'scheduled', Lesson.lesson_date_time < before)
+            boundary = self.session.execute(
+                select(Lesson.lesson_date_time)
+                .where(pending)
+                .order_by(Lesson.lesson_date_time)
+                .offset(chunk_size - 1)
+                .limit(1)
+            ).scalar()
+            chunk = and_(pending, Lesson.lesson_date_time <= boundary) if boundary is not None else pending
+
+            subscription_ids = self.session.execute(
+                select(Lesson.subscription_id)
+                .where(chunk, Lesson.subscription_id.is_not(None))
+                .distinct()
+            ).scalars().all()
+            result = self.session.execute(
+                update(Lesson)
+                .where(chunk)
+                .values(status=status)
+                .execution_options(synchronize_session=False)
+            )
+            if not result.rowcount:
+                self.session.rollback()
+                break
+            # Абонементы, у которых закончились уроки, архивируются в той же транзакции
+            archived = subscriptions.archive_fully_used(sorted(subscription_ids))
+            self.session.commit()
+            totals['lessons'] += result.rowcount
+            totals['archived_subscriptions'] += len(archived)
+            totals['archived_subscription_ids'] += archived
+        if totals['lessons']:
+            lessons_changed.send(self, user_ids=None)
+        if totals['archived_subscriptions']:
+            subscriptions_changed.send(self, user_ids=None)
+        return totals
+
+    def bulk_update_status(self, teacher_id: int, changes: List[Tuple[int, str]]) -> Tuple[List[dict], List[int]]:
+        # Кроме результатов по урокам возвращает id абонементов, заархивированных вместе с ними
+        results = {}
+        requested = {}
+        for lesson_id, status in changes:
+            if lesson_id in results or lesson_id in requested:
+                results[lesson_id] = 'duplicate'
+                requested.pop(lesson_id, None)
+            elif status not in LESSON_STATUSES:
+                results[lesson_id] = 'invalid_status'
+            else:
+                requested[lesson_id] = status
+
+        # Одним запросом проверяем, что все уроки принадлежат учителю; чужие и несуществующие
+        # неотличимы для клиента
+        owned = {row.lesson_id: row for row in self.session.execute(
+            select(Lesson.lesson_id, Lesson.subscription_id, Lesson.student_id)
+            .where(Lesson.lesson_id.in_(list(requested)), Lesson.teacher_id == teacher_id)
+        )} if requested else {}
+
+        by_status = defaultdict(list)
+        for lesson_id, status in requested.items():
+            if lesson_id in owned:
+                by_status[status].append(lesson_id)
+                results[lesson_id] = 'updated'
+            else:
+                results[lesson_id] = 'not_found'
+
+        try:
+            for status, lesson_ids in by_status.items():
+                self.session.execute(
+                    update(Lesson)
+                    .where(Lesson.lesson_id.in_(lesson_ids), Lesson.teacher_id == teacher_id)
+                    .values(status=status)
+                    .execution_options(synchronize_session=False)
+                )
+            archived = SubscriptionRepository(self.session).archive_fully_used(
+                sorted({owned[lesson_id].subscription_id for ids in by_status.values() for lesson_id in ids
+                        if owned[lesson_id].subscription_id is not None})
+            )
+            self.session.commit()
+        except IntegrityError as e:
+            self.session.rollback()
+            raise ValueError(f"Ошибка при обновлении уроков: {str(e)}")
+
+        if by_status:
+            user_ids = {teacher_id} | {owned[lesson_id].student_id for ids in by_status.values() for lesson_id in ids}
+            lessons_changed.send(self, user_ids=user_ids)
+            if archived:
+                subscriptions_changed.send(self, user_ids=user_ids)
+
+        return [{
+            "lesson_id": lesson_id,
+            "status": status,
+            "result": results[lesson_id]
+        } for lesson_id, status in changes], archived
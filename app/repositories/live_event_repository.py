@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.orm import Session
+from app.models import LiveEvent
+
+
+class LiveEventRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def append(self, user_ids: Optional[Iterable[int]], entity: str) -> int:
+        now = datetime.utcnow()
+        # Маршруты передают идентификатор из JWT строкой рядом с числовыми из JSON
+        rows = [{"user_id": None, "entity": entity, "created_at": now}] if user_ids is None else [
+            {"user_id": user_id, "entity": entity, "created_at": now}
+            for user_id in sorted({int(user_id) for user_id in user_ids})
+        ]
+        if not rows:
+            return 0
+        self.session.execute(insert(LiveEvent), rows)
+        self.session.commit()
+        return len(rows)
+
+    def last_event_id(self) -> int:
+        return self.session.execute(select(func.max(LiveEvent.event_id))).scalar() or 0
+
+    def get_after(self, event_id: int, limit: int = 1000) -> List:
+        return self.session.execute(
+            select(LiveEvent.event_id, LiveEvent.user_id, LiveEvent.entity)
+            .where(LiveEvent.event_id > event_id)
+            .order_by(LiveEvent.event_id)
+            .limit(limit)
+        ).all()
+
+    def purge(self, older_than: timedelta) -> int:
+        result = self.session.execute(
+            delete(LiveEvent)
+            .where(LiveEvent.created_at < datetime.utcnow() - older_than)
+        )
+        self.session.commit()
+        return result.rowcount
@@ -0,0 +1,67 @@
+import secrets
+from typing import Tuple
+from sqlalchemy import select, update, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.models import CodeSequence
+
+
+class SequenceRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def reserve_block(self, name: str, size: int) -> Tuple[int, str]:
+        # Резервирует значения [start, start + size) и возвращает start вместе с ключом последовательности.
+        # Идёт в отдельной короткой транзакции, а не в сессии запроса: блокировка строки держится
+        # только на время UPDATE, и откат регистрации не возвращает выданный блок
+        engine = self.session.get_bind()
+        for _ in range(2):
+            with engine.begin() as connection:
+                reserved = connection.execute(
+                    update(CodeSequence)
+                    .where(CodeSequence.name == name)
+                    .values(next_value=CodeSequence.next_value + size)
+                ).rowcount
+                if reserved:
+                    end, secret = connection.execute(
+                        select(CodeSequence.next_value, CodeSequence.secret)
+                        .where(CodeSequence.name == name)
+                    ).one()
+                    return end - size, secret
+
+            # Первое обращение: строку создаёт тот, кто успел первым, остальные повторяют UPDATE
+            secret = secrets.token_hex(32)
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(CodeSequence).values(name=name, next_value=size, secret=secret))
+                return 0, secret
+            except IntegrityError:
+                continue
+        raise ValueError(f"Не удалось зарезервировать значения последовательности {name}")
+
+    def get_value(self, name: str) -> int:
+        return self.session.execute(
+            select(CodeSequence.next_value).where(CodeSequence.name == name)
+        ).scalar_one_or_none() or 0
+
+    def bump(self, name: str) -> int:
+        # Счётчик изменений: +1 в транзакции вызывающего, возвращает новое значение. Блокировка
+        # строки держится до commit, поэтому значения выдаются в порядке коммитов - вызывать
+        # последним перед commit, после всего медленного
+        for _ in range(2):
+            bumped = self.session.execute(
+                update(CodeSequence)
+                .where(CodeSequence.name == name)
+                .values(next_value=CodeSequence.next_value + 1)
+            ).rowcount
+            if bumped:
+                return self.session.execute(
+                    select(CodeSequence.next_value).where(CodeSequence.name == name)
+                ).scalar_one()
+            try:
+                with self.session.begin_nested():
+                    self.session.execute(insert(CodeSequence).values(name=name, next_value=1, secret=''))
+                return 1
+            except IntegrityError:
+                continue
+        raise ValueError(f"Не удалось увеличить счётчик {name}")
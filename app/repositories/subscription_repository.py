@@ -1,9 +1,24 @@
 from typing import List, Optional
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, and_, or_, func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.models import Subscription, Student, Teacher
+from app.models import Subscription, Student, Teacher, Lesson
 from datetime import datetime, date
+from app.signals import subscriptions_changed
+
+# Статусы уроков, которые списываются с абонемента
+CONSUMED_LESSON_STATUSES = ('completed', 'missed')
+
+
+def fully_used_condition():
+    consumed = (
+        select(func.count(Lesson.lesson_id))
+        .where(Lesson.subscription_id == Subscription.subscription_id,
+               Lesson.status.in_(CONSUMED_LESSON_STATUSES))
+        .correlate(Subscription)
+        .scalar_subquery()
+    )
+    return consumed >= Subscription.total_lessons
 
 
 class SubscriptionRepository:
@@ -62,6 +77,7 @@ class SubscriptionRepository:
             )
             self.session.add(subscription)
             self.session.commit()
+            subscriptions_changed.send(self, user_ids={teacher_id, student_id})
             return subscription
         except IntegrityError as e:
             self.session.rollback()
@@ -86,7 +102,9 @@ class SubscriptionRepository:
             if in_archive is not None:
                 subscription.in_archive = in_archive
 
+            user_ids = {subscription.teacher_id, subscription.student_id}
             self.session.commit()
+            subscriptions_changed.send(self, user_ids=user_ids)
             return subscription
         except IntegrityError as e:
             self.session.rollback()
@@ -95,10 +113,65 @@ class SubscriptionRepository:
     def delete_subscription(self, subscription_id: int) -> bool:
         subscription = self.get_subscription_by_id(subscription_id)
         if subscription:
+            user_ids = {subscription.teacher_id, subscription.student_id}
             self.session.delete(subscription)
             self.session.commit()
+            subscriptions_changed.send(self, user_ids=user_ids)
             return True
         return False
 
     def archive_subscription(self, subscription_id: int) -> Optional[Subscription]:
-        return self.update_subscription(subscription_id, in_archive=True)
\ No newline at end of file
+        return self.update_subscription(subscription_id, in_archive=True)
+
+    def archive_expired_subscriptions(self, today: Optional[date] = None, chunk_size: int = 1000) -> List[int]:
+        # Идём по первичному ключу пачками и коммитим каждую: блокировки держатся недолго,
+        # а повторный запуск ничего не меняет, потому что архивные строки отсеиваются условием.
+        # Возвращает id заархивированных - UPDATE мимо ORM, журнал аудита пишет вызывающий
+        today = today or date.today()
+        archived = []
+        last_id = 0
+        while True:
+            ids = self.session.execute(
+                select(Subscription.subscription_id)
+                .where(Subscription.in_archive == False, Subscription.subscription_id > last_id)
+                .order_by(Subscription.subscription_id)
+                .limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            expired = self._lock_for_archive(
+                Subscription.subscription_id.in_(ids),
+                or_(Subscription.end_date < today, fully_used_condition())
+            )
+            self.session.commit()
+            archived += expired
+        if archived:
+            subscriptions_changed.send(self, user_ids=None)
+        return archived
+
+    def archive_fully_used(self, subscription_ids: List[int]) -> List[int]:
+        # Без commit и без сигнала: вызывается внутри транзакции, которая меняет статусы уроков,
+        # сигнал отправляет она. Возвращает id заархивированных для журнала аудита
+        if not subscription_ids:
+            return []
+        return self._lock_for_archive(Subscription.subscription_id.in_(subscription_ids), fully_used_condition())
+
+    def _lock_for_archive(self, *conditions) -> List[int]:
+        # Сначала id под блокировкой, потом UPDATE по ним: параллельная архивация не попадёт
+        # в список, и журнал получит ровно те строки, которые изменил этот вызов
+        ids = self.session.execute(
+            select(Subscription.subscription_id)
+            .where(Subscription.in_archive == False, *conditions)
+            .order_by(Subscription.subscription_id)
+            .with_for_update()
+        ).scalars().all()
+        if ids:
+            self.session.execute(
+                update(Subscription)
+                .where(Subscription.subscription_id.in_(ids))
+                .values(in_archive=True)
+                .execution_options(synchronize_session=False)
+            )
+        return ids
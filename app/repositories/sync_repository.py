@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+from sqlalchemy import select, delete, event, and_, or_, tuple_, inspect
+from sqlalchemy.orm import Session
+from app.models import Lesson, Subscription, StudentTeacherAssociation, TeacherDisciplineAssociation, Tombstone
+
+# имя в ответе /sync -> (модель, колонка времени изменения, ключ, колонки пользователей, которым видна строка)
+SYNC_ENTITIES = {
+    'lessons': (Lesson, Lesson.updated_at, (Lesson.lesson_id,), (Lesson.teacher_id, Lesson.student_id)),
+    'subscriptions': (Subscription, Subscription.updated_at, (Subscription.subscription_id,),
+                      (Subscription.teacher_id, Subscription.student_id)),
+    'student_teachers': (StudentTeacherAssociation, StudentTeacherAssociation.updated_at,
+                         (StudentTeacherAssociation.student_user_id, StudentTeacherAssociation.teacher_user_id),
+                         (StudentTeacherAssociation.student_user_id, StudentTeacherAssociation.teacher_user_id)),
+    'teacher_disciplines': (TeacherDisciplineAssociation, TeacherDisciplineAssociation.updated_at,
+                            (TeacherDisciplineAssociation.teacher_id, TeacherDisciplineAssociation.discipline_id),
+                            (TeacherDisciplineAssociation.teacher_id,)),
+    'deleted': (Tombstone, Tombstone.deleted_at, (Tombstone.tombstone_id,), (Tombstone.user_id,)),
+}
+
+_TRACKED = {model: (name, owners) for name, (model, _, _, owners) in SYNC_ENTITIES.items() if model is not Tombstone}
+
+
+def entity_key(instance) -> str:
+    return ':'.join(str(value) for value in inspect(instance).mapper.primary_key_from_instance(instance))
+
+
+@event.listens_for(Session, 'before_flush')
+def record_tombstones(session, flush_context, instances):
+    # Удаление строки, видимой в /sync, оставляет надгробие каждому, кому она была видна.
+    # Смена учителя или ученика у строки - это удаление для прежнего владельца
+    tombstones = []
+    for instance in session.deleted:
+        tracked = _TRACKED.get(type(instance))
+        if tracked:
+            name, owners = tracked
+            key = entity_key(instance)
+            tombstones += [Tombstone(entity=name, entity_key=key, user_id=user_id)
+                           for user_id in {getattr(instance, owner.key) for owner in owners}]
+    for instance in session.dirty:
+        tracked = _TRACKED.get(type(instance))
+        if tracked:
+            name, owners = tracked
+            state = inspect(instance)
+            for owner in owners:
+                for user_id in state.attrs[owner.key].history.deleted:
+                    if user_id is not None:
+                        tombstones.append(Tombstone(entity=name, entity_key=entity_key(instance), user_id=user_id))
+    session.add_all(tombstones)
+
+
+class SyncRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_changes(
+            self,
+            entity: str,
+            user_id: int,
+            since: Optional[datetime],
+            after_key: Optional[Sequence] = None,
+            limit: int = 500
+    ) -> List:
+        # Строки, изменённые после since, по возрастанию (время, ключ), не больше limit + 1 -
+        # лишняя строка говорит, что есть ещё. after_key - продолжение страницы: строки с тем же
+        # временем, но большим ключом. По запросу на каждую колонку владельца вместо OR:
+        # каждый идёт диапазоном по своему индексу (владелец, updated_at)
+        model, changed_at, keys, owners = SYNC_ENTITIES[entity]
+        rows = {}
+        for owner in owners:
+            query = select(model).where(owner == user_id)
+            if since is not None and after_key is None:
+                query = query.where(changed_at > since)
+            elif since is not None:
+                query = query.where(or_(
+                    changed_at > since,
+                    and_(changed_at == since, tuple_(*keys) > tuple_(*after_key))
+                ))
+            for row in self.session.execute(query.order_by(changed_at, *keys).limit(limit + 1)).scalars():
+                rows[tuple(getattr(row, key.key) for key in keys)] = row
+        ordered = sorted(rows.items(), key=lambda item: (getattr(item[1], changed_at.key), item[0]))
+        return [row for _, row in ordered[:limit + 1]]
+
+    def purge_tombstones(self, older_than: timedelta) -> int:
+        result = self.session.execute(
+            delete(Tombstone)
+            .where(Tombstone.deleted_at < datetime.utcnow() - older_than)
+        )
+        self.session.commit()
+        return result.rowcount
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import update, delete
+from sqlalchemy.orm import Session
+from app.models import UserImport
+
+
+class UserImportRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_import(self, import_id: int) -> Optional[UserImport]:
+        return self.session.get(UserImport, import_id)
+
+    def create_import(self, administrator_id: int, teacher_id: Optional[int], source: str) -> UserImport:
+        # Без commit: импорт коммитится вместе с задачей, которая его выполнит
+        user_import = UserImport(
+            administrator_id=administrator_id,
+            teacher_id=teacher_id,
+            status='queued',
+            source=source,
+            created_at=datetime.utcnow()
+        )
+        self.session.add(user_import)
+        self.session.flush()
+        return user_import
+
+    def start(self, import_id: int) -> Optional[UserImport]:
+        # Условный UPDATE: повторно запущенная задача не импортирует файл второй раз
+        started = self.session.execute(
+            update(UserImport)
+            .where(UserImport.import_id == import_id, UserImport.status == 'queued')
+            .values(status='running')
+        ).rowcount
+        self.session.commit()
+        return self.get_import(import_id) if started else None
+
+    def finish(self, import_id: int, report: dict):
+        self._close(import_id, status='done', report=json.dumps(report, ensure_ascii=False))
+
+    def fail(self, import_id: int, error: str):
+        self._close(import_id, status='failed', error=error)
+
+    def _close(self, import_id: int, **values):
+        self.session.execute(
+            update(UserImport)
+            .where(UserImport.import_id == import_id)
+            .values(source=None, finished_at=datetime.utcnow(), **values)
+        )
+        self.session.commit()
+
+    def purge(self, older_than: timedelta) -> int:
+        # Вместе с отчётами уходят и исходники импортов, которые так и не завершились
+        result = self.session.execute(
+            delete(UserImport)
+            .where(UserImport.created_at < datetime.utcnow() - older_than)
+        )
+        self.session.commit()
+        return result.rowcount
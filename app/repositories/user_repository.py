@@ -1,10 +1,16 @@
-from typing import Optional, Type
-from sqlalchemy import select
+from typing import Iterable, Optional, Type
+from sqlalchemy import select, insert, update
 from sqlalchemy.orm import Session
 from werkzeug.security import check_password_hash, generate_password_hash
-from app.models import User, Student, Teacher, Parent, Administrator
+from app.models import User, Student, Teacher, Parent, Administrator, StudentTeacherAssociation
+from app.repositories.sequence_repository import SequenceRepository
+from app.signals import users_changed
+from app.utils.email_index import EmailIndex
 from sqlalchemy.exc import IntegrityError
 
+# Счётчик изменений email в таблице Sequences: по нему индексы email всех воркеров узнают о новых адресах
+EMAIL_VERSION_SEQUENCE = 'user_emails'
+
 class UserRepository:
     def __init__(self, session: Session):
         self.session = session
@@ -25,10 +31,34 @@ class UserRepository:
             select(User).where(User.email == email)
         ).scalar_one_or_none()
 
-    def create_user_with_role(self, user_data: dict) -> User:
-        existing_user = self.get_user_by_email(user_data['email'])
-        if existing_user:
-            raise ValueError("Пользователь с таким email уже существует")
+    def get_emails(self, user_ids: Optional[Iterable[int]] = None) -> Iterable[str]:
+        query = select(User.email)
+        if user_ids is not None:
+            query = query.where(User.user_id.in_(list(user_ids)))
+        return self.session.connection().execute(query).scalars().all()
+
+    def get_email_version(self) -> int:
+        return SequenceRepository(self.session).get_value(EMAIL_VERSION_SEQUENCE)
+
+    def get_emails_since(self, version: int) -> list:
+        # (email, email_version) адресов, записанных после version; идёт по ix_Users_email_version
+        return self.session.connection().execute(
+            select(User.email, User.email_version).where(User.email_version > version)
+        ).all()
+
+    def _bump_email_version(self) -> int:
+        # Одна строка Sequences на все записи email: пока транзакция не закоммичена, остальные
+        # регистрации и смены email во всех воркерах ждут её. Поэтому вызывается последним перед
+        # commit - блокировка держится на время одного UPDATE и самого commit
+        return SequenceRepository(self.session).bump(EMAIL_VERSION_SEQUENCE)
+
+    def create_user_with_role(self, user_data: dict, email_index: Optional[EmailIndex] = None) -> User:
+        # Если индекс говорит, что email точно свободен, запрос не нужен; гонку двух регистраций
+        # всё равно ловит уникальный индекс Users.email
+        if email_index is None or email_index.might_contain(user_data['email']):
+            existing_user = self.get_user_by_email(user_data['email'])
+            if existing_user:
+                raise ValueError("Пользователь с таким email уже существует")
 
         try:
             user = User(
@@ -76,13 +106,21 @@ class UserRepository:
                 )
                 self.session.add(admin)
 
+            # Последним перед commit: строка счётчика заблокирована до конца транзакции
+            user.email_version = self._bump_email_version()
             self.session.commit()
-            return user
-
+        except IntegrityError as e:
+            self.session.rollback()
+            if self.get_user_by_email(user_data['email']):
+                raise ValueError("Пользователь с таким email уже существует")
+            raise ValueError(f"Ошибка при создании пользователя: {str(e)}")
         except Exception as e:
             self.session.rollback()
             raise ValueError(f"Ошибка при создании пользователя: {str(e)}")
 
+        users_changed.send(self, user_ids={user.user_id})
+        return user
+
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
         user = self.get_user_by_email(email)
         if user and check_password_hash(user.password_hash, password):
@@ -97,13 +135,122 @@ class UserRepository:
                     setattr(user, 'password_hash', generate_password_hash(value))
                 else:
                     setattr(user, key, value)
+            if 'email' in update_data:
+                user.email_version = self._bump_email_version()
             self.session.commit()
+            users_changed.send(self, user_ids={user_id})
         return user
 
+    def get_calendar_feed_version(self, user_id: int) -> Optional[int]:
+        return self.session.execute(
+            select(User.calendar_feed_version).where(User.user_id == user_id)
+        ).scalar_one_or_none()
+
+    def rotate_calendar_feed_version(self, user_id: int) -> int:
+        user = self.get_user_by_id(user_id)
+        if not user:
+            raise ValueError("Пользователь не найден")
+        user.calendar_feed_version = (user.calendar_feed_version or 0) + 1
+        self.session.commit()
+        return user.calendar_feed_version
+
     def delete_user(self, user_id: int) -> bool:
         user = self.get_user_by_id(user_id)
         if user:
             self.session.delete(user)
             self.session.commit()
+            users_changed.send(self, user_ids={user_id})
             return True
-        return False
\ No newline at end of file
+        return False
+
+    def get_search_documents(self, user_ids: Optional[Iterable[int]] = None) -> list:
+        # Плоские строки для индекса поиска людей: роли через внешние соединения, без загрузки моделей.
+        # Полная выборка - сотни тысяч строк, поэтому через Core-соединение сессии, без ORM-обёртки
+        query = (
+            select(
+                User.user_id,
+                User.full_name,
+                User.email,
+                User.city,
+                User.unique_code,
+                Student.school_name,
+                Student.class_number,
+                Student.user_id.is_not(None).label('is_student'),
+                Teacher.user_id.is_not(None).label('is_teacher'),
+                Parent.user_id.is_not(None).label('is_parent'),
+                Administrator.Users_user_id.is_not(None).label('is_administrator'),
+            )
+            .outerjoin(Student, Student.user_id == User.user_id)
+            .outerjoin(Teacher, Teacher.user_id == User.user_id)
+            .outerjoin(Parent, Parent.user_id == User.user_id)
+            .outerjoin(Administrator, Administrator.Users_user_id == User.user_id)
+        )
+        if user_ids is not None:
+            query = query.where(User.user_id.in_(list(user_ids)))
+        return self.session.connection().execute(query).all()
+
+    def get_existing_emails(self, emails: Iterable[str]) -> set:
+        return {email.lower() for email in self.session.execute(
+            select(User.email).where(User.email.in_(list(emails)))
+        ).scalars()}
+
+    def get_teacher_ids_by_email(self, emails: Iterable[str]) -> dict:
+        emails = list(emails)
+        if not emails:
+            return {}
+        return {email.lower(): user_id for email, user_id in self.session.execute(
+            select(User.email, Teacher.user_id)
+            .join(Teacher, Teacher.user_id == User.user_id)
+            .where(User.email.in_(emails))
+        )}
+
+    def bulk_create_users(self, users: list) -> dict:
+        # Пачка пользователей с ролями и связями с учителями в одной транзакции: по одному
+        # многострочному INSERT на таблицу. Пароли уже захешированы (password_hash), коды выданы.
+        # id новых пользователей читаются обратно по email - RETURNING в MySQL нет
+        try:
+            self.session.execute(insert(User), [{
+                'full_name': user['full_name'],
+                'email': user['email'],
+                'password_hash': user['password_hash'],
+                'birthday': user['birthday'],
+                'gender': user['gender'],
+                'city': user['city'],
+                'phone_number': user['phone_number'],
+                'unique_code': user['unique_code'],
+            } for user in users])
+            ids = {email.lower(): user_id for email, user_id in self.session.execute(
+                select(User.email, User.user_id).where(User.email.in_([user['email'] for user in users]))
+            )}
+
+            roles = {'student': [], 'teacher': [], 'parent': []}
+            associations = []
+            for user in users:
+                user_id = ids[user['email'].lower()]
+                if user['role'] == 'student':
+                    roles['student'].append({'user_id': user_id, 'class_number': user['class_number'],
+                                             'school_name': user['school_name']})
+                    associations += [{'student_user_id': user_id, 'teacher_user_id': teacher_id}
+                                     for teacher_id in user.get('teacher_ids', ())]
+                elif user['role'] == 'teacher':
+                    roles['teacher'].append({'user_id': user_id, 'experience': user['experience'],
+                                             'main_work': user['main_work']})
+                else:
+                    roles['parent'].append({'user_id': user_id, 'work_name': user['work_name'],
+                                            'work_phone': user['work_phone']})
+            for model, rows in ((Student, roles['student']), (Teacher, roles['teacher']),
+                                (Parent, roles['parent']), (StudentTeacherAssociation, associations)):
+                if rows:
+                    self.session.execute(insert(model), rows)
+            self.session.execute(
+                update(User)
+                .where(User.user_id.in_(list(ids.values())))
+                .values(email_version=self._bump_email_version())
+            )
+            self.session.commit()
+        except IntegrityError as e:
+            self.session.rollback()
+            raise ValueError(f"Ошибка при создании пользователей: {str(e.orig)}")
+
+        users_changed.send(self, user_ids=set(ids.values()))
+        return ids
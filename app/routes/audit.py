@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.audit import AUDITED
+from app.repositories import AuditRepository, RoleRepository
+from app.db import db
+
+audit_bp = Blueprint('audit', __name__)
+
+repo_audit = AuditRepository(db.session)
+repo_roles = RoleRepository(db.session)
+
+MAX_AUDIT_PER_PAGE = 200
+AUDIT_ENTITIES = set(AUDITED.values())
+
+
+def _parse_cursor(cursor: str):
+    created_at, audit_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(audit_id)
+
+
+@audit_bp.route('', methods=['GET'])
+@jwt_required()
+def get_audit_log():
+    current_user_id = get_jwt_identity()
+
+    try:
+        actor_id = request.args.get('actor_id', type=int)
+        entity = request.args.get('entity')
+        if entity is not None and entity not in AUDIT_ENTITIES:
+            return jsonify({"message": f"entity must be one of: {', '.join(sorted(AUDIT_ENTITIES))}"}), 400
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+        until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+        before = _parse_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        limit = min(int(request.args.get('limit', 50)), MAX_AUDIT_PER_PAGE)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+    except ValueError:
+        return jsonify({"message": "Invalid actor_id, since, until, cursor or limit"}), 400
+
+    try:
+        # Журнал видят администраторы с уровнем доступа logs или full
+        administrator = repo_roles.get_administrator_by_user_id(current_user_id)
+        if not administrator or administrator.access_level not in ('logs', 'full'):
+            return jsonify({"message": "Only administrators with access to logs can view the audit log"}), 403
+
+        records = repo_audit.get_records(
+            actor_id=actor_id,
+            entity=entity,
+            entity_key=request.args.get('entity_key'),
+            since=since,
+            until=until,
+            before=before,
+            limit=limit
+        )
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        return jsonify({
+            "records": [{
+                "audit_id": record.audit_id,
+                "created_at": record.created_at.isoformat(),
+                "actor_id": record.actor_id,
+                "action": record.action,
+                "entity": record.entity,
+                "entity_key": record.entity_key,
+                "changes": json.loads(record.changes),
+                "endpoint": record.endpoint
+            } for record in records],
+            "next_cursor": f"{records[-1].created_at.isoformat()}_{records[-1].audit_id}" if has_more else None
+        }), 200
+
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
@@ -1,4 +1,7 @@
-from flask import request, jsonify
+import logging
+import math
+
+from flask import request, jsonify, current_app
 from flask import Blueprint
 from werkzeug.security import check_password_hash
 from app.models import User
@@ -17,18 +20,68 @@ from flask_jwt_extended import (
     get_jwt_identity
 )
 
+from ..signals import users_changed
+from ..utils.email_index import EmailIndex
 from ..utils.generate_unique_code import generate_unique_code
+from ..utils.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
 
 repo = UserRepository(db.session)
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def _email_index() -> EmailIndex:
+    index = current_app.extensions.get('email_index')
+    if index is None:
+        app = current_app._get_current_object()
+
+        def load():
+            # Фоновая пересборка идёт в своём потоке, поэтому контекст приложения открываем сами
+            with app.app_context():
+                return repo.get_emails()
+
+        def version():
+            with app.app_context():
+                return repo.get_email_version()
+
+        def changes(since):
+            with app.app_context():
+                return repo.get_emails_since(since)
+
+        index = current_app.extensions['email_index'] = EmailIndex(
+            load, ttl=current_app.config['EMAIL_INDEX_TTL'], version=version, changes=changes,
+            catch_up_interval=current_app.config['EMAIL_INDEX_CATCH_UP_INTERVAL']
+        )
+
+        def refresh(sender, user_ids=None):
+            if user_ids is None:
+                index.expire()
+            else:
+                index.add(repo.get_emails(user_ids))
+
+        users_changed.connect(refresh, weak=False)
+    return index
+
+
+def _check_email_limiter() -> RateLimiter:
+    limiter = current_app.extensions.get('check_email_limiter')
+    if limiter is None:
+        limiter = current_app.extensions['check_email_limiter'] = RateLimiter(
+            'check_email',
+            rate=current_app.config['CHECK_EMAIL_RATE'],
+            capacity=current_app.config['CHECK_EMAIL_BURST']
+        )
+    return limiter
+
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
         data = request.get_json()
-        print(data)
+        # Пароль и другие секретные поля вырезает фильтр логирования (app.log)
+        logger.debug("Register request: %s", data)
 
         required_fields = ['fullName', 'email', 'password', 'birthDate', 'selectedGender', 'selectedRole']
         if not all(field in data for field in required_fields):
@@ -40,7 +93,7 @@ def register():
             return jsonify({"error": "Некорректный формат даты. Используйте YYYY-MM-DD"}), 400
 
         data['unique_code'] = generate_unique_code()
-        user = repo.create_user_with_role(data)
+        user = repo.create_user_with_role(data, email_index=_email_index())
 
         access_token = create_access_token(identity=str(user.user_id))
         refresh_token = create_refresh_token(identity=str(user.user_id))
@@ -67,9 +120,9 @@ def login():
 
 
     user = repo.authenticate_user(data.get('email'), data.get('password'))
-    print(data.get('email'), data.get('password'))
 
     if not user:
+        logger.info("Failed login", extra={"email": data.get('email')})
         return jsonify({"error": "Неверный email или пароль"}), 401
 
     access_token = create_access_token(identity=str(user.user_id))
@@ -103,9 +156,18 @@ def profile():
 
 @auth_bp.route('/check_email', methods=['POST'])
 def check_email():
-    data = request.get_json()
-
-    user = repo.get_user_by_email(data['email'])
+    retry_after = _check_email_limiter().acquire(request.remote_addr)
+    if retry_after:
+        response = jsonify({"msg": "Слишком много запросов, попробуйте позже"})
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response, 429
+
+    data = request.get_json(silent=True)
+    if not data or not data.get('email'):
+        return jsonify({"msg": "Не указан email"}), 400
+
+    # В базу идём, только если индекс не может сказать "точно свободен"
+    user = _email_index().might_contain(data['email']) and repo.get_user_by_email(data['email'])
     if not user:
         return jsonify({"msg": "Данный email свободен"})
     else:
@@ -0,0 +1,275 @@
+import hashlib
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+
+from flask import Blueprint, Response, current_app, jsonify, request, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from app.audit import audit
+from app.repositories import RoleRepository, LessonRepository, UserRepository, BranchRepository
+from app.repositories.lesson_repository import LESSON_STATUSES
+from app.db import db
+from app.signals import lessons_changed
+from app.utils.feed_cache import FeedCache
+from app.utils.free_slots import free_slots
+from app.utils.ical import render_calendar
+
+lessons_bp = Blueprint('lessons', __name__)
+repo_lessons = LessonRepository(db.session)
+repo_roles = RoleRepository(db.session)
+repo_users = UserRepository(db.session)
+repo_branches = BranchRepository(db.session)
+
+MAX_BULK_LESSONS = 500
+MAX_CALENDAR_DAYS = 62
+
+
+@lessons_bp.route('/bulk_status', methods=['PUT'])
+@jwt_required()
+def bulk_update_lesson_status():
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+
+    if not data or not isinstance(data.get('lessons'), list) or not data['lessons']:
+        return jsonify({"message": "Missing required fields"}), 400
+    if len(data['lessons']) > MAX_BULK_LESSONS:
+        return jsonify({"message": f"No more than {MAX_BULK_LESSONS} lessons per request"}), 400
+
+    try:
+        changes = [(int(item['lesson_id']), item['status']) for item in data['lessons']]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"message": "Each item needs an integer lesson_id and a status"}), 400
+
+    try:
+        teacher = repo_roles.get_teacher_by_user_id(current_user_id)
+        if not teacher:
+            return jsonify({"message": "Only teachers can update lessons"}), 403
+
+        results, archived = repo_lessons.bulk_update_status(teacher.user_id, changes)
+        # Абонементы с исчерпанными уроками архивируются UPDATE мимо ORM - в журнал аудита явно
+        audit.record_many('update', 'subscriptions', archived, {"in_archive": [False, True]})
+
+        return jsonify({
+            "updated": sum(1 for item in results if item['result'] == 'updated'),
+            "results": results
+        }), 200
+
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@lessons_bp.route('/calendar', methods=['GET'])
+@jwt_required()
+def get_calendar():
+    current_user_id = get_jwt_identity()
+    user_type = request.args.get('role', 'student')
+    statuses = request.args.getlist('status')
+
+    # from и to - даты включительно
+    try:
+        start = date.fromisoformat(request.args['from'])
+        end = date.fromisoformat(request.args.get('to', request.args['from']))
+    except KeyError:
+        return jsonify({"message": "Missing required parameter: from"}), 400
+    except ValueError:
+        return jsonify({"message": "Dates must be in YYYY-MM-DD format"}), 400
+
+    if end < start:
+        return jsonify({"message": "'to' must not be earlier than 'from'"}), 400
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        return jsonify({"message": f"Range must not exceed {MAX_CALENDAR_DAYS} days"}), 400
+    if any(status not in LESSON_STATUSES for status in statuses):
+        return jsonify({"message": f"Unknown status. Use one of: {', '.join(LESSON_STATUSES)}"}), 400
+
+    try:
+        lessons = repo_lessons.get_lessons_in_range(
+            current_user_id,
+            user_type,
+            datetime.combine(start, time()),
+            datetime.combine(end + timedelta(days=1), time()),
+            statuses
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+    counterpart = 'teacher_id' if user_type == 'student' else 'student_id'
+    days = [{
+        "date": day.isoformat(),
+        "lessons": [{
+            "lesson_id": lesson.lesson_id,
+            "time": lesson.lesson_date_time.strftime('%H:%M'),
+            "duration": lesson.duration,
+            "status": lesson.status,
+            counterpart: getattr(lesson, counterpart),
+            "subscription_id": lesson.subscription_id,
+            "online_call_url": lesson.online_call_url
+        } for lesson in day_lessons]
+    } for day, day_lessons in groupby(lessons, key=lambda lesson: lesson.lesson_date_time.date())]
+
+    return jsonify({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "days": days
+    }), 200
+
+
+@lessons_bp.route('/free_slots', methods=['GET'])
+@jwt_required()
+def get_free_slots():
+    try:
+        teacher_id = int(request.args['teacher_id'])
+        branch_id = int(request.args['branch_id'])
+        start = date.fromisoformat(request.args['from'])
+        end = date.fromisoformat(request.args.get('to', request.args['from']))
+        duration = int(request.args.get('duration', 45))
+        step = int(request.args.get('step', 15))
+    except KeyError as e:
+        return jsonify({"message": f"Missing required parameter: {e.args[0]}"}), 400
+    except ValueError:
+        return jsonify({"message": "Invalid parameter format"}), 400
+
+    if end < start:
+        return jsonify({"message": "'to' must not be earlier than 'from'"}), 400
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        return jsonify({"message": f"Range must not exceed {MAX_CALENDAR_DAYS} days"}), 400
+    if not 5 <= duration <= 480 or not 5 <= step <= 240:
+        return jsonify({"message": "duration must be 5-480 minutes and step 5-240 minutes"}), 400
+
+    try:
+        teacher = repo_roles.get_teacher_by_user_id(teacher_id)
+        if not teacher:
+            return jsonify({"message": "Teacher not found"}), 404
+        branch = repo_branches.get_branch_by_id(branch_id)
+        if not branch:
+            return jsonify({"message": "Branch not found"}), 404
+
+        busy = repo_lessons.get_busy_intervals(
+            teacher_id,
+            datetime.combine(start, time()),
+            datetime.combine(end + timedelta(days=1), time())
+        )
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+    days = [{
+        "date": day.isoformat(),
+        "slots": [slot.strftime('%H:%M') for slot in slots]
+    } for day, slots in free_slots(
+        busy, start, end, branch.working_start, branch.working_end,
+        timedelta(minutes=duration), timedelta(minutes=step), not_before=datetime.now()
+    ) if slots]
+
+    return jsonify({
+        "teacher_id": teacher_id,
+        "branch_id": branch_id,
+        "duration": duration,
+        "days": days
+    }), 200
+
+
+def _feed_serializer() -> URLSafeSerializer:
+    secret = current_app.config['CALENDAR_FEED_SECRET_KEY'] or current_app.config['JWT_SECRET_KEY']
+    return URLSafeSerializer(secret, salt='calendar-feed')
+
+
+def _feed_cache() -> FeedCache:
+    cache = current_app.extensions.get('calendar_feed_cache')
+    if cache is None:
+        cache = current_app.extensions['calendar_feed_cache'] = FeedCache(
+            'calendar_feed',
+            ttl=current_app.config['CALENDAR_FEED_CACHE_TTL'],
+            max_entries=current_app.config['CALENDAR_FEED_CACHE_SIZE']
+        )
+
+        def invalidate(sender, user_ids=None):
+            cache.invalidate(None if user_ids is None else [
+                (int(user_id), role) for user_id in user_ids for role in ('teacher', 'student')
+            ])
+
+        lessons_changed.connect(invalidate, weak=False)
+    return cache
+
+
+def _feed_url(current_user_id, user_type: str, rotate: bool = False):
+    if user_type == 'teacher':
+        role = repo_roles.get_teacher_by_user_id(current_user_id)
+    elif user_type == 'student':
+        role = repo_roles.get_student_by_user_id(current_user_id)
+    else:
+        return jsonify({"message": "Invalid user type. Use 'student' or 'teacher'"}), 400
+    if not role:
+        return jsonify({"message": f"Current user is not a {user_type}"}), 403
+
+    if rotate:
+        version = repo_users.rotate_calendar_feed_version(role.user_id)
+    else:
+        version = repo_users.get_calendar_feed_version(role.user_id)
+    token = _feed_serializer().dumps([role.user_id, user_type, version])
+    return jsonify({"url": url_for('lessons.get_calendar_feed', token=token, _external=True)}), 200
+
+
+@lessons_bp.route('/calendar/feed_url', methods=['GET'])
+@jwt_required()
+def get_calendar_feed_url():
+    try:
+        return _feed_url(get_jwt_identity(), request.args.get('role', 'student'))
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@lessons_bp.route('/calendar/feed_url', methods=['POST'])
+@jwt_required()
+def rotate_calendar_feed_url():
+    # Отзывает все выданные пользователю ссылки на фиды (обеих ролей) и выдаёт новую
+    try:
+        return _feed_url(get_jwt_identity(), request.args.get('role', 'student'), rotate=True)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@lessons_bp.route('/calendar/feed/<token>.ics', methods=['GET'])
+def get_calendar_feed(token):
+    # Без JWT: календарные клиенты не передают cookies, доступ даёт подписанный токен в URL
+    try:
+        user_id, user_type, *version = _feed_serializer().loads(token)
+    except (BadSignature, ValueError):
+        return jsonify({"message": "Feed not found"}), 404
+    # Ссылки, выданные до появления версий, считаются версией 0.
+    # Версия сверяется до кэша, иначе отозванная ссылка работала бы ещё CALENDAR_FEED_CACHE_TTL
+    current_version = repo_users.get_calendar_feed_version(user_id)
+    if current_version is None or (version[0] if version else 0) != current_version:
+        return jsonify({"message": "Feed not found"}), 404
+
+    cache = _feed_cache()
+    key = (user_id, user_type)
+    cached = cache.get(key)
+    if cached is None:
+        generation = cache.generation(key)
+        user = repo_users.get_user_by_id(user_id)
+        if not user:
+            return jsonify({"message": "Feed not found"}), 404
+
+        since = datetime.combine(date.today() - timedelta(days=current_app.config['CALENDAR_FEED_PAST_DAYS']), time())
+        rows = repo_lessons.get_calendar_feed(user_id, user_type, since)
+        chunks = [chunk.encode('utf-8') for chunk in render_calendar(user.full_name, rows)]
+        digest = hashlib.sha1()
+        for chunk in chunks:
+            digest.update(chunk)
+        cached = (digest.hexdigest(), chunks)
+        cache.put(key, generation, cached)
+
+    etag, chunks = cached
+    headers = {'Cache-Control': 'private, no-cache'}
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(iter(chunks), mimetype='text/calendar', headers=headers)
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,152 @@
+import time
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from app.repositories import SyncRepository
+from app.repositories.sync_repository import SYNC_ENTITIES
+from app.db import db
+from app.live_events import STREAM_HEADERS, STREAM_PING, STREAM_READY, live_events, stream_event
+
+sync_bp = Blueprint('sync', __name__)
+repo_sync = SyncRepository(db.session)
+
+SERIALIZERS = {
+    'lessons': lambda lesson: {
+        "lesson_id": lesson.lesson_id,
+        "lesson_date_time": lesson.lesson_date_time.isoformat(),
+        "duration": lesson.duration,
+        "status": lesson.status,
+        "teacher_id": lesson.teacher_id,
+        "student_id": lesson.student_id,
+        "subscription_id": lesson.subscription_id,
+        "classroom_id": lesson.classroom_id,
+        "online_call_url": lesson.online_call_url,
+        "updated_at": lesson.updated_at.isoformat()
+    },
+    'subscriptions': lambda subscription: {
+        "subscription_id": subscription.subscription_id,
+        "total_lessons": subscription.total_lessons,
+        "start_date": subscription.start_date.isoformat(),
+        "end_date": subscription.end_date.isoformat(),
+        "in_archive": subscription.in_archive,
+        "teacher_id": subscription.teacher_id,
+        "student_id": subscription.student_id,
+        "updated_at": subscription.updated_at.isoformat()
+    },
+    'student_teachers': lambda association: {
+        "student_id": association.student_user_id,
+        "teacher_id": association.teacher_user_id,
+        "updated_at": association.updated_at.isoformat()
+    },
+    'teacher_disciplines': lambda association: {
+        "teacher_id": association.teacher_id,
+        "discipline_id": association.discipline_id,
+        "updated_at": association.updated_at.isoformat()
+    },
+    'deleted': lambda tombstone: {
+        "entity": tombstone.entity,
+        "key": tombstone.entity_key,
+        "deleted_at": tombstone.deleted_at.isoformat()
+    },
+}
+
+
+def _sync_serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.config['JWT_SECRET_KEY'], salt='sync')
+
+
+@sync_bp.route('', methods=['GET'])
+@jwt_required()
+def sync():
+    current_user_id = int(get_jwt_identity())
+    started = datetime.utcnow()
+
+    # Токен - подписанные курсоры по каждой сущности: [время, ключ последней строки или None].
+    # Ключ есть, только если страница была неполной и выдача продолжается с того же места
+    cursors = {}
+    issued = None
+    token = request.args.get('since')
+    if token:
+        try:
+            payload = _sync_serializer().loads(token)
+        except BadSignature:
+            return jsonify({"message": "Invalid sync token"}), 400
+        if payload.get('u') != current_user_id:
+            return jsonify({"message": "Sync token belongs to another user"}), 400
+        cursors = payload['c']
+        issued = datetime.fromisoformat(payload['i'])
+
+    limit = current_app.config['SYNC_PAGE_SIZE']
+    overlap = timedelta(seconds=current_app.config['SYNC_OVERLAP_SECONDS'])
+    # Надгробия старше срока хранения уже удалены - такому клиенту нужна полная выгрузка
+    retention = timedelta(days=current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+    reset = issued is not None and issued < started - retention
+    if reset:
+        cursors = {}
+
+    try:
+        response = {}
+        next_cursors = {}
+        has_more = False
+        for entity in SYNC_ENTITIES:
+            cursor = cursors.get(entity)
+            since, after_key = (None, None) if cursor is None else (datetime.fromisoformat(cursor[0]), cursor[1])
+            if since is not None and after_key is None:
+                since -= overlap
+
+            rows = repo_sync.get_changes(entity, current_user_id, since, after_key, limit)
+            if len(rows) > limit:
+                rows = rows[:limit]
+                _, changed_at, keys, _ = SYNC_ENTITIES[entity]
+                next_cursors[entity] = [getattr(rows[-1], changed_at.key).isoformat(),
+                                        [getattr(rows[-1], key.key) for key in keys]]
+                has_more = True
+            else:
+                next_cursors[entity] = [started.isoformat(), None]
+            response[entity] = [SERIALIZERS[entity](row) for row in rows]
+
+        response.update({
+            "next": _sync_serializer().dumps({'u': current_user_id, 'i': started.isoformat(), 'c': next_cursors}),
+            "has_more": has_more,
+            "reset": reset or not token
+        })
+        return jsonify(response), 200
+
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@sync_bp.route('/stream', methods=['GET'])
+@jwt_required()
+def stream():
+    current_user_id = int(get_jwt_identity())
+    config = current_app.config
+    broker = live_events.broker
+    subscriber = broker.subscribe(current_user_id, limit=config['LIVE_EVENTS_MAX_STREAMS'])
+    if subscriber is None:
+        response = jsonify({"message": "Too many open streams, retry later"})
+        response.headers['Retry-After'] = str(config['LIVE_EVENTS_HEARTBEAT'])
+        return response, 503
+
+    heartbeat = config['LIVE_EVENTS_HEARTBEAT']
+    deadline = time.monotonic() + config['LIVE_EVENTS_STREAM_TTL']
+
+    def events():
+        try:
+            yield STREAM_READY
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                changed = subscriber.wait(min(heartbeat, remaining))
+                if not changed:
+                    yield STREAM_PING
+                for entity in sorted(changed):
+                    yield stream_event(entity)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return Response(events(), mimetype='text/event-stream', headers=STREAM_HEADERS)
@@ -1,13 +1,22 @@
+import io
+import json
 import os
-from flask import Blueprint, jsonify, request, current_app, send_from_directory
+
+from flask import Blueprint, jsonify, request, current_app, send_from_directory, url_for
 from werkzeug.utils import secure_filename
 
 from app import allowed_file, UPLOAD_FOLDER
+from app.jobs import jobs
+from app.repositories.user_import_repository import UserImportRepository
 from app.repositories.user_repository import UserRepository
 from app.repositories.role_repository import RoleRepository
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app.db import db
+from app.signals import users_changed
+from app.tasks import import_users_csv
+from app.utils.people_index import ROLES, PeopleIndex, PersonDocument
+from app.utils.user_import import read_csv
 
 from flask_jwt_extended import (
     jwt_required,
@@ -18,6 +27,44 @@ users_bp = Blueprint('users', __name__)
 
 repo = UserRepository(db.session)
 repo_roles = RoleRepository(db.session)
+repo_imports = UserImportRepository(db.session)
+
+MAX_SEARCH_PER_PAGE = 100
+
+
+def _people_index() -> PeopleIndex:
+    index = current_app.extensions.get('people_index')
+    if index is None:
+        app = current_app._get_current_object()
+
+        def load(user_ids=None):
+            # Фоновая пересборка идёт в своём потоке, поэтому контекст приложения открываем сами
+            with app.app_context():
+                rows = repo.get_search_documents(user_ids)
+            role_sets = {}
+            documents = []
+            for user_id, full_name, email, city, unique_code, school_name, class_number, *flags in rows:
+                flags = tuple(flags)
+                roles = role_sets.get(flags)
+                if roles is None:
+                    roles = role_sets[flags] = tuple(role for role, flag in zip(ROLES, flags) if flag)
+                documents.append(PersonDocument(
+                    user_id, full_name, email, city, unique_code, roles, school_name, class_number
+                ))
+            return documents
+
+        index = current_app.extensions['people_index'] = PeopleIndex(
+            load,
+            ttl=current_app.config['PEOPLE_SEARCH_TTL'],
+            similarity=current_app.config['PEOPLE_SEARCH_SIMILARITY']
+        )
+
+        def refresh(sender, user_ids=None):
+            index.refresh(user_ids)
+
+        users_changed.connect(refresh, weak=False)
+    return index
+
 
 @users_bp.route('/get_self', methods=['GET'])
 @jwt_required()
@@ -233,6 +280,137 @@ def get_user_by_unique_code(unique_code):
     return jsonify(user_data), 200
 
 
+@users_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_users():
+    current_user_id = get_jwt_identity()
+    query = request.args.get('q', '').strip()
+    role = request.args.get('role')
+
+    if not query:
+        return jsonify({"message": "Missing required parameter: q"}), 400
+    if role is not None and role not in ROLES:
+        return jsonify({"message": f"Role must be one of: {', '.join(ROLES)}"}), 400
+
+    class_number = request.args.get('class_number', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_SEARCH_PER_PAGE)
+
+    try:
+        if not (repo_roles.get_teacher_by_user_id(current_user_id)
+                or repo_roles.get_administrator_by_user_id(current_user_id)):
+            return jsonify({"message": "Only teachers and administrators can search users"}), 403
+
+        total, matches = _people_index().search(
+            query,
+            role=role,
+            class_number=class_number,
+            offset=(page - 1) * per_page,
+            limit=per_page
+        )
+
+        return jsonify({
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "results": [{
+                "user_id": document.user_id,
+                "full_name": document.full_name,
+                "email": document.email,
+                "city": document.city,
+                "unique_code": document.unique_code,
+                "roles": list(document.roles),
+                "school_name": document.school_name,
+                "class_number": document.class_number,
+                "score": round(score, 3)
+            } for score, document in matches]
+        }), 200
+
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+def _import_status(user_import) -> dict:
+    result = {
+        "import_id": user_import.import_id,
+        "status": user_import.status,
+        "created_at": user_import.created_at.isoformat(),
+        "finished_at": user_import.finished_at.isoformat() if user_import.finished_at else None,
+        "report_url": url_for('users.get_import', import_id=user_import.import_id)
+    }
+    if user_import.error:
+        result["error"] = user_import.error
+    if user_import.report:
+        result.update(json.loads(user_import.report))
+    return result
+
+
+@users_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_users():
+    current_user_id = get_jwt_identity()
+
+    if 'file' in request.files:
+        source = request.files['file'].read()
+    elif request.mimetype == 'text/csv':
+        source = request.get_data()
+    else:
+        return jsonify({"message": "Send a CSV file in the 'file' field or a text/csv body"}), 400
+
+    try:
+        if not repo_roles.get_administrator_by_user_id(current_user_id):
+            return jsonify({"message": "Only administrators can import users"}), 403
+
+        teacher_id = None
+        teacher_code = request.values.get('teacher_code')
+        if teacher_code:
+            teacher = repo.get_user_by_unique_code(teacher_code)
+            if not teacher or not repo_roles.get_teacher_by_user_id(teacher.user_id):
+                return jsonify({"message": "Teacher with this unique code not found"}), 404
+            teacher_id = teacher.user_id
+
+        try:
+            source = source.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return jsonify({"message": "CSV must be UTF-8 encoded"}), 400
+        # Заголовок проверяется сразу, строки и пароли - в фоновой задаче: хеширование сотен
+        # паролей не укладывается в таймаут воркера gunicorn
+        next(read_csv(io.StringIO(source)), None)
+
+        user_import = repo_imports.create_import(int(current_user_id), teacher_id, source)
+        jobs.enqueue(import_users_csv, {"import_id": user_import.import_id})
+        # Импорт и задача появляются вместе или не появляются вовсе
+        db.session.commit()
+
+        return jsonify(_import_status(user_import)), 202
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 500
+
+
+@users_bp.route('/import/<int:import_id>', methods=['GET'])
+@jwt_required()
+def get_import(import_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        if not repo_roles.get_administrator_by_user_id(current_user_id):
+            return jsonify({"message": "Only administrators can view imports"}), 403
+
+        user_import = repo_imports.get_import(import_id)
+        if not user_import:
+            return jsonify({"message": "Import not found"}), 404
+
+        return jsonify(_import_status(user_import)), 200
+
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
 @users_bp.route('/get_profile_picture_by_url', methods=['GET'])
 def get_profile_picture_by_url():
     profile_picture_url = request.args.get('url')
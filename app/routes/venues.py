@@ -0,0 +1,170 @@
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.repositories import RoleRepository, BranchRepository, ClassroomRepository
+from app.db import db
+from app.utils.utilisation import available_minutes, occupied_minutes, utilisation
+
+venues_bp = Blueprint('venues', __name__)
+repo_roles = RoleRepository(db.session)
+repo_branches = BranchRepository(db.session)
+repo_classrooms = ClassroomRepository(db.session)
+
+MAX_REALLOCATION_DAYS = 31
+MAX_UTILISATION_DAYS = 366
+
+
+@venues_bp.route('/branches/<int:branch_id>/allocate', methods=['POST'])
+@jwt_required()
+def allocate_classrooms(branch_id):
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+
+    if not data or not isinstance(data.get('lesson_ids'), list) or not data['lesson_ids']:
+        return jsonify({"message": "Missing required fields"}), 400
+
+    try:
+        lesson_ids = [int(lesson_id) for lesson_id in data['lesson_ids']]
+    except (TypeError, ValueError):
+        return jsonify({"message": "lesson_ids must be integers"}), 400
+
+    try:
+        administrator = repo_roles.get_administrator_by_user_id(current_user_id)
+        teacher = repo_roles.get_teacher_by_user_id(current_user_id)
+        if not administrator and not teacher:
+            return jsonify({"message": "Only administrators and teachers can book classrooms"}), 403
+
+        if not repo_branches.get_branch_by_id(branch_id):
+            return jsonify({"message": "Branch not found"}), 404
+
+        # Учитель может размещать только свои уроки
+        result = repo_classrooms.allocate_lessons(
+            branch_id, lesson_ids, teacher_id=None if administrator else teacher.user_id
+        )
+
+        return jsonify({
+            "assigned": [{"lesson_id": lesson_id, "classroom_id": classroom_id}
+                         for lesson_id, classroom_id in result['assigned'].items()],
+            "unassigned": result['unassigned'],
+            "not_found": result['not_found']
+        }), 200
+
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@venues_bp.route('/branches/<int:branch_id>/reallocate', methods=['POST'])
+@jwt_required()
+def reallocate_classrooms(branch_id):
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+
+    try:
+        start = date.fromisoformat(data['from'])
+        end = date.fromisoformat(data.get('to', data['from']))
+    except KeyError:
+        return jsonify({"message": "Missing required fields"}), 400
+    except (TypeError, ValueError):
+        return jsonify({"message": "Dates must be in YYYY-MM-DD format"}), 400
+
+    if end < start or (end - start).days >= MAX_REALLOCATION_DAYS:
+        return jsonify({"message": f"Range must be 1-{MAX_REALLOCATION_DAYS} days"}), 400
+
+    try:
+        if not repo_roles.get_administrator_by_user_id(current_user_id):
+            return jsonify({"message": "Only administrators can reallocate classrooms"}), 403
+
+        if not repo_branches.get_branch_by_id(branch_id):
+            return jsonify({"message": "Branch not found"}), 404
+
+        result = repo_classrooms.reallocate_branch(
+            branch_id,
+            datetime.combine(start, time()),
+            datetime.combine(end + timedelta(days=1), time())
+        )
+        return jsonify(result), 200
+
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+def _heatmap(values: np.ndarray) -> list:
+    return np.round(values, 3).tolist()
+
+
+@venues_bp.route('/utilisation', methods=['GET'])
+@jwt_required()
+def get_utilisation():
+    current_user_id = get_jwt_identity()
+
+    try:
+        start = date.fromisoformat(request.args['from'])
+        end = date.fromisoformat(request.args.get('to', request.args['from']))
+        branch_ids = [int(branch_id) for branch_id in request.args.getlist('branch_id')]
+    except KeyError:
+        return jsonify({"message": "Missing required parameter: from"}), 400
+    except ValueError:
+        return jsonify({"message": "Invalid parameter format"}), 400
+
+    if end < start or (end - start).days >= MAX_UTILISATION_DAYS:
+        return jsonify({"message": f"Range must be 1-{MAX_UTILISATION_DAYS} days"}), 400
+
+    try:
+        if not repo_roles.get_administrator_by_user_id(current_user_id):
+            return jsonify({"message": "Only administrators can view utilisation"}), 403
+
+        branches = [branch for branch in repo_branches.get_all_branches()
+                    if not branch_ids or branch.branch_id in branch_ids]
+        classrooms = [classroom for classroom in repo_classrooms.get_all_classrooms()
+                      if classroom.branch_id in {branch.branch_id for branch in branches}]
+        room_index = {classroom.classroom_id: index for index, classroom in enumerate(classrooms)}
+
+        classroom_ids, starts, durations = repo_classrooms.get_lesson_columns(
+            list(room_index),
+            datetime.combine(start, time()),
+            datetime.combine(end + timedelta(days=1), time())
+        )
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+    occupied = occupied_minutes(
+        np.array(starts, dtype='datetime64[us]').astype('datetime64[m]'),
+        np.array(durations, dtype=np.int64),
+        np.array([room_index[classroom_id] for classroom_id in classroom_ids], dtype=np.int64),
+        len(classrooms)
+    )
+    branch_rooms = np.array([classroom.branch_id for classroom in classrooms])
+
+    branches_data = []
+    for branch in branches:
+        available = available_minutes(start, end, branch.working_start, branch.working_end)
+        rooms = np.flatnonzero(branch_rooms == branch.branch_id)
+        branch_occupied = occupied[rooms].sum(axis=0)
+        branch_available = available * len(rooms)
+        branches_data.append({
+            "branch_id": branch.branch_id,
+            "address": branch.address,
+            "utilisation": round(float(branch_occupied.sum() / branch_available.sum()), 4)
+            if branch_available.sum() else 0.0,
+            "heatmap": _heatmap(utilisation(branch_occupied, branch_available)),
+            "classrooms": [{
+                "classroom_id": classrooms[index].classroom_id,
+                "name": classrooms[index].name,
+                "utilisation": round(float(occupied[index].sum() / available.sum()), 4) if available.sum() else 0.0,
+                "heatmap": _heatmap(utilisation(occupied[index], available))
+            } for index in rooms]
+        })
+
+    return jsonify({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        # heatmap[день недели 0=пн][час 0-23] - доля рабочих минут, занятых уроками
+        "branches": branches_data
+    }), 200
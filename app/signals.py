@@ -0,0 +1,10 @@
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Отправляется после commit; user_ids - затронутые учителя и ученики, None - неизвестно, кто именно
+lessons_changed = _signals.signal('lessons-changed')
+# Отправляется после commit; user_ids - созданные, изменённые или удалённые пользователи
+users_changed = _signals.signal('users-changed')
+# Отправляется после commit; user_ids - учителя и ученики изменённых абонементов, None - неизвестно
+subscriptions_changed = _signals.signal('subscriptions-changed')
@@ -0,0 +1,74 @@
+import importlib
+import time
+from typing import Dict, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from app.db import db
+
+# имя -> (модуль, атрибут blueprint, url_prefix)
+BLUEPRINTS: Dict[str, Tuple[str, str, Optional[str]]] = {
+    'users': ('app.routes.users', 'users_bp', '/users'),
+    'auth': ('app.routes.auth', 'auth_bp', '/auth'),
+    'associations': ('app.routes.associations', 'association_bp', '/associations'),
+    'subscriptions': ('app.routes.subscriptions', 'subscriptions_bp', '/subscriptions'),
+    'disciplines': ('app.routes.disciplines', 'disciplines_bp', '/disciplines'),
+    'lessons': ('app.routes.lessons', 'lessons_bp', '/lessons'),
+    'venues': ('app.routes.venues', 'venues_bp', '/venues'),
+    'sync': ('app.routes.sync', 'sync_bp', '/sync'),
+    'audit': ('app.routes.audit', 'audit_bp', '/audit'),
+    'metrics': ('app.routes.metrics', 'metrics_bp', None),
+}
+
+
+def startup_timings(app: Flask) -> dict:
+    return app.extensions.setdefault('startup', {'imports': {}})
+
+
+def register_blueprints(app: Flask):
+    enabled = app.config.get('ENABLED_BLUEPRINTS')
+    if enabled is not None:
+        unknown = set(enabled) - set(BLUEPRINTS)
+        if unknown:
+            raise ValueError(f"Unknown blueprints in ENABLED_BLUEPRINTS: {', '.join(sorted(unknown))}")
+
+    timings = startup_timings(app)['imports']
+    for name, (module_name, attribute, url_prefix) in BLUEPRINTS.items():
+        if enabled is not None and name not in enabled:
+            continue
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        timings[name] = time.perf_counter() - started
+        app.register_blueprint(getattr(module, attribute), url_prefix=url_prefix)
+
+
+def configure_models(app: Flask):
+    # Без этого конфигурация всех relationship выполняется на первом запросе
+    started = time.perf_counter()
+    configure_mappers()
+    startup_timings(app)['configure_mappers'] = time.perf_counter() - started
+
+
+def warm_pool(app: Flask, size: Optional[int] = None):
+    # Вызывать после fork: открытые до fork сокеты нельзя делить между процессами
+    size = app.config.get('WARM_POOL_SIZE', 0) if size is None else size
+    if not size:
+        return
+
+    started = time.perf_counter()
+    with app.app_context():
+        pool = db.engine.pool
+        if hasattr(pool, 'size'):
+            size = min(size, pool.size())
+        connections = []
+        try:
+            for _ in range(size):
+                connection = db.engine.connect()
+                connection.execute(text('SELECT 1'))
+                connections.append(connection)
+        finally:
+            for connection in connections:
+                connection.close()
+    startup_timings(app)['warm_pool'] = time.perf_counter() - started
@@ -0,0 +1,113 @@
+import io
+from datetime import timedelta
+
+from flask import current_app
+
+from app.audit import audit
+from app.db import db
+from app.jobs import jobs
+from app.repositories.job_repository import JobRepository
+from app.repositories.lesson_repository import LessonRepository
+from app.repositories.live_event_repository import LiveEventRepository
+from app.repositories.subscription_repository import SubscriptionRepository
+from app.repositories.sync_repository import SyncRepository
+from app.repositories.user_import_repository import UserImportRepository
+from app.repositories.user_repository import UserRepository
+from app.utils.generate_unique_code import generate_unique_code
+from app.utils.user_import import UserImporter, hashing_pool, read_csv
+
+
+@jobs.task('jobs.purge_finished')
+def purge_finished_jobs(days: int = None):
+    days = days if days is not None else current_app.config['JOBS_RETENTION_DAYS']
+    return JobRepository(db.session).purge_finished(timedelta(days=days))
+
+
+jobs.periodic('jobs.purge_finished', every=3600)
+
+
+@jobs.task('subscriptions.archive_expired')
+def archive_expired_subscriptions(chunk_size: int = 1000):
+    archived = SubscriptionRepository(db.session).archive_expired_subscriptions(chunk_size=chunk_size)
+    # Архивация идёт UPDATE мимо ORM - в журнал аудита записываем явно
+    audit.record_many('update', 'subscriptions', archived, {"in_archive": [False, True]})
+    current_app.logger.info("Archived %s expired subscriptions", len(archived))
+    return len(archived)
+
+
+jobs.periodic('subscriptions.archive_expired', every=3600)
+
+
+@jobs.task('lessons.finish_past')
+def finish_past_lessons(status: str = None, chunk_size: int = 20000):
+    status = status or current_app.config['LESSONS_PAST_STATUS']
+    totals = LessonRepository(db.session).finish_past_lessons(status=status, chunk_size=chunk_size)
+    audit.record_many('update', 'subscriptions', totals.pop('archived_subscription_ids'), {"in_archive": [False, True]})
+    current_app.logger.info("Marked %s past lessons as %s, archived %s subscriptions",
+                            totals['lessons'], status, totals['archived_subscriptions'])
+    return totals
+
+
+jobs.periodic('lessons.finish_past', every=24 * 3600)
+
+
+@jobs.task('sync.purge_tombstones')
+def purge_tombstones(days: int = None):
+    days = days if days is not None else current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS']
+    return SyncRepository(db.session).purge_tombstones(timedelta(days=days))
+
+
+jobs.periodic('sync.purge_tombstones', every=24 * 3600)
+
+
+@jobs.task('live_events.purge')
+def purge_live_events(seconds: int = None):
+    seconds = seconds if seconds is not None else current_app.config['LIVE_EVENTS_RETENTION_SECONDS']
+    return LiveEventRepository(db.session).purge(timedelta(seconds=seconds))
+
+
+jobs.periodic('live_events.purge', every=3600)
+
+
+# Одна попытка: упавший посреди импорт уже создал часть пользователей, повтор только запутал бы отчёт
+@jobs.task('users.import_csv', max_attempts=1)
+def import_users_csv(import_id: int):
+    repository = UserImportRepository(db.session)
+    user_import = repository.start(import_id)
+    if user_import is None:
+        return None
+    try:
+        with hashing_pool(current_app.config['USER_IMPORT_PROCESSES']) as pool:
+            report = UserImporter(
+                UserRepository(db.session),
+                generate_unique_code,
+                pool=pool,
+                teacher_id=user_import.teacher_id,
+                max_rows=current_app.config['USER_IMPORT_MAX_ROWS']
+            ).run(read_csv(io.StringIO(user_import.source)))
+    except ValueError as e:
+        db.session.rollback()
+        repository.fail(import_id, str(e))
+        return None
+    except Exception:
+        db.session.rollback()
+        repository.fail(import_id, "Импорт прерван внутренней ошибкой")
+        raise
+
+    # Импорт пишет многострочными INSERT мимо ORM - в журнал аудита записываем явно
+    for entry in report['rows']:
+        if entry['status'] == 'created':
+            audit.record('create', 'users', entry['user_id'],
+                         {"email": entry['email'], "source": "csv_import", "import_id": import_id},
+                         actor_id=user_import.administrator_id)
+    repository.finish(import_id, report)
+    return {key: report[key] for key in ('created', 'failed', 'skipped')}
+
+
+@jobs.task('users.purge_imports')
+def purge_user_imports(hours: int = None):
+    hours = hours if hours is not None else current_app.config['USER_IMPORT_RETENTION_HOURS']
+    return UserImportRepository(db.session).purge(timedelta(hours=hours))
+
+
+jobs.periodic('users.purge_imports', every=3600)
@@ -0,0 +1,110 @@
+import heapq
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (lesson_id, начало, конец, текущая аудитория или None)
+LessonInterval = Tuple[int, datetime, datetime, Optional[int]]
+
+
+def max_overlap(lessons: Iterable[LessonInterval]) -> int:
+    # Нижняя граница числа аудиторий: наибольшее число уроков, идущих одновременно
+    events = []
+    for _, start, end, _ in lessons:
+        events.append((start, 1))
+        events.append((end, -1))
+    # При равном времени окончание раньше начала: уроки встык не пересекаются
+    events.sort(key=lambda event: (event[0], event[1]))
+    current = best = 0
+    for _, delta in events:
+        current += delta
+        best = max(best, current)
+    return best
+
+
+def partition(
+        lessons: Iterable[LessonInterval],
+        rooms: Sequence[int]
+) -> Tuple[Dict[int, int], List[int]]:
+    # Разбиение интервалов (раскраска интервального графа) жадно по времени начала: аудитория
+    # освобождается, как только кончается её урок, новая открывается, только если все открытые
+    # заняты. Так используется ровно max_overlap аудиторий - меньше нельзя. Урок остаётся в своей
+    # прежней аудитории, если она свободна и уже открыта или открытых пока меньше max_overlap -
+    # иначе предпочтение прежним аудиториям открыло бы лишние
+    lessons = sorted(lessons, key=lambda lesson: (lesson[1], lesson[2]))
+    limit = max_overlap(lessons)
+    order = {room: index for index, room in enumerate(rooms)}
+    unopened = list(range(len(rooms)))
+    opened = set()
+    # Свободные открытые аудитории; из кучи удаляются лениво, по free_set
+    free: List[int] = []
+    free_set = set()
+    busy: List[Tuple[datetime, int]] = []
+
+    assignment: Dict[int, int] = {}
+    unassigned: List[int] = []
+    for lesson_id, start, end, current in lessons:
+        while busy and busy[0][0] <= start:
+            _, index = heapq.heappop(busy)
+            heapq.heappush(free, index)
+            free_set.add(index)
+
+        index = order.get(current)
+        if index is None or not (index in free_set or (index not in opened and len(opened) < limit)):
+            while free and free[0] not in free_set:
+                heapq.heappop(free)
+            while unopened and unopened[0] in opened:
+                heapq.heappop(unopened)
+            if free:
+                index = heapq.heappop(free)
+            elif unopened:
+                index = heapq.heappop(unopened)
+            else:
+                unassigned.append(lesson_id)
+                continue
+        opened.add(index)
+        free_set.discard(index)
+        heapq.heappush(busy, (end, index))
+        assignment[lesson_id] = rooms[index]
+    return assignment, unassigned
+
+
+class RoomTimeline:
+    # Занятость аудиторий для пошагового назначения: по каждой аудитории отсортированные интервалы
+    def __init__(self, rooms: Sequence[int], booked: Iterable[LessonInterval] = ()):
+        self.rooms = list(rooms)
+        self._starts: Dict[int, List[datetime]] = {room: [] for room in self.rooms}
+        self._ends: Dict[int, List[datetime]] = {room: [] for room in self.rooms}
+        for _, start, end, room in sorted(booked, key=lambda lesson: lesson[1]):
+            if room in self._starts:
+                self._insert(room, start, end)
+
+    def _insert(self, room: int, start: datetime, end: datetime):
+        position = bisect_left(self._starts[room], start)
+        self._starts[room].insert(position, start)
+        self._ends[room].insert(position, end)
+
+    def gap_before(self, room: int, start: datetime, end: datetime) -> Optional[float]:
+        # None - аудитория занята; иначе простой перед уроком в секундах (чем меньше, тем плотнее)
+        starts, ends = self._starts[room], self._ends[room]
+        position = bisect_left(starts, start)
+        if position < len(starts) and starts[position] < end:
+            return None
+        if position > 0 and ends[position - 1] > start:
+            return None
+        if position == 0:
+            return float('inf')
+        return (start - ends[position - 1]).total_seconds()
+
+    def assign(self, start: datetime, end: datetime, preferred: Optional[int] = None) -> Optional[int]:
+        # Best fit: аудитория, где урок встаёт вплотную к предыдущему, чтобы не дробить свободное время
+        if preferred in self._starts and self.gap_before(preferred, start, end) is not None:
+            room = preferred
+        else:
+            candidates = [(gap, index, room) for index, room in enumerate(self.rooms)
+                          for gap in (self.gap_before(room, start, end),) if gap is not None]
+            if not candidates:
+                return None
+            room = min(candidates)[2]
+        self._insert(room, start, end)
+        return room
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def email_hash(email: str) -> int:
+    # Регистр и пробелы по краям отбрасываются: лишнее совпадение стоит только запроса в базу
+    digest = hashlib.blake2b(email.strip().lower().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class EmailIndex:
+    # Отсортированный массив 64-битных хешей занятых email плюс хеши, добавленные после сборки.
+    # Промах по индексу означает "точно свободен"; попадание - "возможно занят", проверяет база.
+    # Изменённые и удалённые адреса из индекса не убираются: это лишь лишний запрос до пересборки.
+    # Адреса из других воркеров догружает фоновый поток раз в catch_up_interval секунд по общему
+    # счётчику изменений email (version), поэтому проверка всегда отвечает из памяти. Адрес,
+    # занятый в другом воркере за последние catch_up_interval секунд, может показаться свободным:
+    # регистрацию всё равно не пропустит уникальный индекс Users.email
+    def __init__(
+            self,
+            loader: Callable[[], Iterable[str]],
+            ttl: float = 600,
+            version: Optional[Callable[[], int]] = None,
+            changes: Optional[Callable[[int], Iterable[Tuple[str, int]]]] = None,
+            catch_up_interval: float = 1.0
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.version = version
+        self.changes = changes
+        self.catch_up_interval = catch_up_interval
+        self._hashes: Optional[np.ndarray] = None
+        # хеш -> момент добавления
+        self._added: dict = {}
+        self._built_at = 0.0
+        self._known_version = 0
+        self._pid = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def rebuild(self):
+        started = time.monotonic()
+        try:
+            # Версия читается до адресов: всё, что записано позже, догрузит catch_up
+            known_version = self.version() if self.version is not None else 0
+            hashes = np.unique(np.fromiter((email_hash(email) for email in self.loader()), dtype=np.uint64))
+        except Exception:
+            with self._lock:
+                self._rebuilding = False
+            raise
+        with self._lock:
+            self._hashes = hashes
+            self._built_at = started
+            self._known_version = known_version
+            # Адреса, добавленные во время сборки, могли в неё не попасть - их оставляем
+            self._added = {value: added for value, added in self._added.items() if added >= started}
+            self._rebuilding = False
+
+    def _ensure_fresh(self):
+        self._ensure_following()
+        if self._hashes is None:
+            self.rebuild()
+            return
+        with self._lock:
+            if self._rebuilding or time.monotonic() - self._built_at <= self.ttl:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self.rebuild, daemon=True).start()
+
+    def _ensure_following(self):
+        # Поток мастера не переживает fork, поэтому в каждом процессе запускается заново
+        with self._lock:
+            if self.version is None or self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._follow, name='email-index-catch-up', daemon=True).start()
+
+    def _follow(self):
+        while True:
+            time.sleep(self.catch_up_interval)
+            try:
+                self.catch_up()
+            except Exception:
+                logger.exception("Email index catch-up failed")
+
+    def add(self, emails: Iterable[str]):
+        now = time.monotonic()
+        with self._lock:
+            self._added.update((email_hash(email), now) for email in emails if email)
+
+    def expire(self):
+        with self._lock:
+            self._built_at = 0.0
+
+    def catch_up(self) -> bool:
+        # Счётчик увеличивается в транзакции записи и заблокирован до её commit, поэтому версии
+        # видны в порядке коммитов: адреса с версией выше известной - ровно то, чего нет в индексе
+        if self.version is None:
+            return False
+        current = self.version()
+        with self._lock:
+            known_version = self._known_version
+        if current == known_version:
+            return False
+        now = time.monotonic()
+        latest = current
+        added = {}
+        for email, email_version in self.changes(known_version):
+            added[email_hash(email)] = now
+            latest = max(latest, email_version)
+        with self._lock:
+            self._added.update(added)
+            self._known_version = max(self._known_version, latest)
+        return True
+
+    def _contains(self, value: int) -> bool:
+        with self._lock:
+            hashes, added = self._hashes, self._added
+            if value in added:
+                return True
+        position = np.searchsorted(hashes, np.uint64(value))
+        return bool(position < hashes.size and hashes[position] == value)
+
+    def might_contain(self, email: str) -> bool:
+        self._ensure_fresh()
+        found = self._contains(email_hash(email))
+        metrics.inc("email_index_lookups_total", (("result", "maybe_taken" if found else "definitely_free"),))
+        return found
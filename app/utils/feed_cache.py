@@ -0,0 +1,54 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+from app.metrics import metrics
+
+
+class FeedCache:
+    def __init__(self, name: str, ttl: float = 300, max_entries: int = 1000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                metrics.cache_hit(self.name)
+                return entry[1]
+            self._entries.pop(key, None)
+        metrics.cache_miss(self.name)
+        return None
+
+    def generation(self, key: Hashable) -> tuple:
+        # Снимается до чтения из базы: если пока строился ответ пришла инвалидация,
+        # put() его не сохранит
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def put(self, key: Hashable, generation: tuple, value: Any):
+        with self._lock:
+            if generation != (self._epoch, self._generations.get(key, 0)):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Optional[Iterable[Hashable]] = None):
+        with self._lock:
+            if keys is None:
+                self._epoch += 1
+                self._entries.clear()
+                self._generations.clear()
+                return
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._entries.pop(key, None)
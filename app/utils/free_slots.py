@@ -0,0 +1,67 @@
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    # Ожидает интервалы, отсортированные по началу (как их отдаёт запрос с ORDER BY)
+    merged: List[Interval] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _align(moment: datetime, origin: datetime, step: timedelta) -> datetime:
+    # Слоты начинаются с начала рабочего дня с шагом step: 09:00, 09:15, ...
+    if moment <= origin:
+        return origin
+    return origin + -((origin - moment) // step) * step
+
+
+def free_slots(
+        busy: Iterable[Interval],
+        first_day: date,
+        last_day: date,
+        working_start: time,
+        working_end: time,
+        duration: timedelta,
+        step: timedelta,
+        not_before: Optional[datetime] = None
+) -> Iterator[Tuple[date, List[datetime]]]:
+    # Один проход по занятым интервалам для всего диапазона: указатель только движется вперёд
+    busy = merge_intervals(busy)
+    index = 0
+    day = first_day
+    while day <= last_day:
+        window_start = datetime.combine(day, working_start)
+        window_end = datetime.combine(day, working_end)
+        origin = window_start
+        if not_before is not None and not_before > window_start:
+            window_start = not_before
+
+        while index < len(busy) and busy[index][1] <= window_start:
+            index += 1
+
+        slots = []
+        cursor = window_start
+        position = index
+        while cursor < window_end:
+            gap_end = window_end
+            if position < len(busy) and busy[position][0] < window_end:
+                gap_end = min(gap_end, busy[position][0])
+            slot = _align(cursor, origin, step)
+            while slot + duration <= gap_end:
+                slots.append(slot)
+                slot += step
+            if gap_end == window_end:
+                break
+            cursor = busy[position][1]
+            position += 1
+
+        yield day, slots
+        day += timedelta(days=1)
@@ -1,7 +1,88 @@
-import random
+import hashlib
+import os
 import string
+import threading
+from typing import Callable, Tuple
 
-def generate_unique_code(length=8):
-    characters = string.ascii_letters + string.digits  # Буквы (верхний и нижний регистр) + цифры
-    random_string = ''.join(random.choice(characters) for _ in range(length))
-    return random_string
+from flask import current_app
+
+from app.db import db
+from app.repositories.sequence_repository import SequenceRepository
+
+# Один регистр: в MySQL Users.unique_code сравнивается без учёта регистра, и коды,
+# различающиеся только регистром, столкнулись бы на уникальном индексе
+ALPHABET = string.digits + string.ascii_uppercase
+# 11 символов: 36**11 ~ 1.3 * 10**17 номеров. Прежние случайные коды - 8 символов, сид выдаёт 12,
+# так что с ними новые не совпадут
+CODE_LENGTH = 11
+DOMAIN = len(ALPHABET) ** CODE_LENGTH
+# Сбалансированная сеть Фейстеля на 2 * HALF_BITS = 58 битах - наименьшей чётной ширине,
+# вмещающей DOMAIN: 2**57 < 36**11 < 2**58
+HALF_BITS = 29
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+SEQUENCE_NAME = 'user_unique_code'
+
+
+class CodePermutation:
+    # Ключевая перестановка [0, DOMAIN): разные номера дают разные коды, но соседние номера
+    # не дают похожих кодов, и по коду не восстановить ни номер, ни число пользователей
+    def __init__(self, key: bytes):
+        self.key = key
+
+    def _round(self, index: int, value: int) -> int:
+        digest = hashlib.blake2b(bytes((index,)) + value.to_bytes(4, 'big'), key=self.key, digest_size=4).digest()
+        return int.from_bytes(digest, 'big') & HALF_MASK
+
+    def permute(self, value: int) -> int:
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for index in range(ROUNDS):
+            left, right = right, left ^ self._round(index, right)
+        return (left << HALF_BITS) | right
+
+    def code(self, value: int) -> str:
+        if not 0 <= value < DOMAIN:
+            raise ValueError("Номер кода вне допустимого диапазона")
+        # Cycle walking: перестановка 2**58 значений, пока не попадём в [0, DOMAIN) - так
+        # она остаётся биекцией на самом DOMAIN; в среднем 2**58 / DOMAIN ~ 2.2 шага
+        value = self.permute(value)
+        while value >= DOMAIN:
+            value = self.permute(value)
+        characters = []
+        for _ in range(CODE_LENGTH):
+            value, digit = divmod(value, len(ALPHABET))
+            characters.append(ALPHABET[digit])
+        return ''.join(reversed(characters))
+
+
+class CodeAllocator:
+    # Выдаёт коды из зарезервированного блока номеров; к базе обращается раз в block_size кодов
+    def __init__(self, reserve: Callable[[int], Tuple[int, str]], block_size: int = 100):
+        self.reserve = reserve
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+        self._permutation = None
+        self._pid = None
+
+    def allocate(self) -> str:
+        with self._lock:
+            # После fork блок родителя достался бы всем детям - каждый процесс резервирует свой
+            if self._next >= self._end or self._pid != os.getpid():
+                start, secret = self.reserve(self.block_size)
+                self._permutation = CodePermutation(bytes.fromhex(secret))
+                self._next, self._end = start, start + self.block_size
+                self._pid = os.getpid()
+            value = self._next
+            self._next += 1
+        return self._permutation.code(value)
+
+
+def generate_unique_code() -> str:
+    allocator = current_app.extensions.get('unique_codes')
+    if allocator is None:
+        allocator = current_app.extensions['unique_codes'] = CodeAllocator(
+            lambda size: SequenceRepository(db.session).reserve_block(SEQUENCE_NAME, size),
+            block_size=current_app.config['UNIQUE_CODE_BLOCK_SIZE']
+        )
+    return allocator.allocate()
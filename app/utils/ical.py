@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Iterable, Iterator
+
+PRODID = "-//Speech Therapists Office//Lessons//RU"
+SEQUENCE_EPOCH = datetime(2020, 1, 1)
+
+STATUS_MAP = {
+    'scheduled': 'CONFIRMED',
+    'completed': 'CONFIRMED',
+    'missed': 'CONFIRMED',
+    'cancelled_in_time': 'CANCELLED',
+}
+
+STATUS_TITLES = {
+    'scheduled': '',
+    'completed': ' (проведено)',
+    'missed': ' (пропущено)',
+    'cancelled_in_time': ' (отменено)',
+}
+
+
+def escape_text(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold(line: str) -> str:
+    # RFC 5545: строки длиннее 75 октетов переносятся, продолжение начинается с пробела
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    start = 0
+    limit = 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Не режем многобайтовый символ UTF-8 посередине
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start = end
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_datetime(value: datetime) -> str:
+    # Время уроков хранится локальным, поэтому в фиде оно "плавающее", без Z
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def sequence(lesson) -> int:
+    # Номер ревизии события растёт с каждым изменением урока: секунды от SEQUENCE_EPOCH до updated_at
+    # (created_at для этого не годится - у импортированных уроков он бывает позже updated_at).
+    # До 2088 года укладывается в 32-битное целое, которого ждут календарные клиенты
+    return max(0, int((lesson.updated_at - SEQUENCE_EPOCH).total_seconds()))
+
+
+def render_calendar(name: str, lessons: Iterable, domain: str = 'speechtherapistsoffice') -> Iterator[str]:
+    yield ''.join((
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        fold(f'PRODID:{PRODID}'),
+        'CALSCALE:GREGORIAN\r\n',
+        fold(f'X-WR-CALNAME:{escape_text(name)}'),
+    ))
+    for lesson in lessons:
+        lines = [
+            'BEGIN:VEVENT\r\n',
+            fold(f'UID:lesson-{lesson.lesson_id}@{domain}'),
+            # DTSTAMP из данных урока, а не текущее время: одинаковые данные дают одинаковый фид и ETag.
+            # По DTSTAMP и SEQUENCE клиент понимает, что перенос или отмена новее его копии события
+            f'DTSTAMP:{lesson.updated_at.strftime("%Y%m%dT%H%M%SZ")}\r\n',
+            f'LAST-MODIFIED:{lesson.updated_at.strftime("%Y%m%dT%H%M%SZ")}\r\n',
+            f'SEQUENCE:{sequence(lesson)}\r\n',
+            f'DTSTART:{format_datetime(lesson.lesson_date_time)}\r\n',
+            f'DURATION:PT{lesson.duration}M\r\n',
+            fold(f'SUMMARY:{escape_text("Занятие: " + lesson.counterpart_name + STATUS_TITLES.get(lesson.status, ""))}'),
+            f'STATUS:{STATUS_MAP.get(lesson.status, "CONFIRMED")}\r\n',
+        ]
+        if lesson.online_call_url:
+            lines.append(fold(f'URL:{lesson.online_call_url}'))
+            lines.append(fold(f'LOCATION:{escape_text(lesson.online_call_url)}'))
+        lines.append('END:VEVENT\r\n')
+        yield ''.join(lines)
+    yield 'END:VCALENDAR\r\n'
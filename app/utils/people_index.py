@@ -0,0 +1,227 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROLES = ('student', 'teacher', 'parent', 'administrator')
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+class PersonDocument(NamedTuple):
+    user_id: int
+    full_name: str
+    email: str
+    city: Optional[str]
+    unique_code: Optional[str]
+    roles: Tuple[str, ...]
+    school_name: Optional[str]
+    class_number: Optional[int]
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace('ё', 'е')
+
+
+def words(text: Optional[str]) -> List[str]:
+    return _WORD.findall(normalize(text)) if text else []
+
+
+def document_words(document: PersonDocument) -> set:
+    text = ' '.join(filter(None, (
+        document.full_name, document.email, document.city, document.school_name, document.unique_code
+    )))
+    found = set(words(text))
+    if document.class_number is not None:
+        found.add(str(document.class_number))
+    return found
+
+
+def word_trigrams(word: str) -> set:
+    # Как в pg_trgm: два пробела в начале и один в конце, чтобы короткие слова и начала слов
+    # тоже давали триграммы
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def term_trigrams(term: str) -> set:
+    # У запроса хвостового пробела нет: "ива" совпадает со всеми словами, которые так начинаются
+    padded = f'  {term}'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def term_similarity(term_grams: set, word: str) -> float:
+    return len(term_grams & word_trigrams(word)) / len(term_grams)
+
+
+class _Snapshot:
+    # Неизменяемый индекс: словарь слов, триграмма -> id слов, слово -> позиции документов (CSR)
+    def __init__(self, documents: Sequence[PersonDocument]):
+        self.documents = list(documents)
+        self.positions = {document.user_id: position for position, document in enumerate(self.documents)}
+        # Ранг имени для сортировки равных по сходству результатов без сравнения строк при поиске
+        names = [normalize(document.full_name) for document in self.documents]
+        self.name_ranks = np.empty(len(self.documents), dtype=np.int32)
+        self.name_ranks[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(names), dtype=np.int32)
+        role_bits = {role: 1 << bit for bit, role in enumerate(ROLES)}
+        self.roles = np.array(
+            [sum(role_bits[role] for role in document.roles) for document in self.documents], dtype=np.uint8
+        )
+        self.class_numbers = np.array(
+            [-1 if document.class_number is None else document.class_number for document in self.documents],
+            dtype=np.int16
+        )
+
+        vocabulary: Dict[str, int] = {}
+        word_ids: List[int] = []
+        doc_positions: List[int] = []
+        for position, document in enumerate(self.documents):
+            document_vocabulary = document_words(document)
+            word_ids.extend(vocabulary.setdefault(word, len(vocabulary)) for word in document_vocabulary)
+            doc_positions.extend([position] * len(document_vocabulary))
+
+        word_ids = np.array(word_ids, dtype=np.int32)
+        doc_positions = np.array(doc_positions, dtype=np.int32)
+        order = np.argsort(word_ids, kind='stable')
+        self.word_docs = doc_positions[order]
+        self.word_offsets = np.concatenate(([0], np.cumsum(np.bincount(word_ids, minlength=len(vocabulary)))))
+
+        self.vocabulary = list(vocabulary)
+        grams: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self.vocabulary):
+            for gram in word_trigrams(word):
+                grams.setdefault(gram, []).append(word_id)
+        self.gram_words = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+
+    def term_scores(self, term: str, threshold: float) -> np.ndarray:
+        # Оценка каждого документа по одному слову запроса: лучшее сходство среди его слов
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        grams = term_trigrams(term)
+        postings = [self.gram_words[gram] for gram in grams if gram in self.gram_words]
+        if not postings:
+            return scores
+        counts = np.bincount(np.concatenate(postings), minlength=len(self.vocabulary))
+        similarity = counts / len(grams)
+        matched = np.flatnonzero(similarity >= threshold)
+        # Присваивание по возрастанию сходства: при повторе позиции остаётся наибольшее
+        for word_id in matched[np.argsort(similarity[matched])]:
+            docs = self.word_docs[self.word_offsets[word_id]:self.word_offsets[word_id + 1]]
+            scores[docs] = similarity[word_id]
+        return scores
+
+
+class PeopleIndex:
+    def __init__(self, loader: Callable[[Optional[Iterable[int]]], List[PersonDocument]],
+                 ttl: float = 600, similarity: float = 0.6, max_pending: int = 5000):
+        self.loader = loader
+        self.ttl = ttl
+        self.similarity = similarity
+        self.max_pending = max_pending
+        self._snapshot: Optional[_Snapshot] = None
+        self._built_at = 0.0
+        # user_id -> (момент изменения, документ или None для удалённого)
+        self._pending: Dict[int, Tuple[float, Optional[PersonDocument]]] = {}
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def rebuild(self):
+        started = time.monotonic()
+        try:
+            snapshot = _Snapshot(self.loader(None))
+        except Exception:
+            with self._lock:
+                self._rebuilding = False
+            raise
+        with self._lock:
+            self._snapshot = snapshot
+            self._built_at = started
+            # Изменения, пришедшие во время сборки, в снимок могли не попасть - оставляем их
+            self._pending = {user_id: entry for user_id, entry in self._pending.items() if entry[0] >= started}
+            self._rebuilding = False
+
+    def _ensure_fresh(self, spawn: Callable[[Callable], None]):
+        if self._snapshot is None:
+            self.rebuild()
+            return
+        with self._lock:
+            stale = time.monotonic() - self._built_at > self.ttl or len(self._pending) > self.max_pending
+            if not stale or self._rebuilding:
+                return
+            self._rebuilding = True
+        # Пока строится новый снимок, поиск продолжает работать по старому
+        spawn(self.rebuild)
+
+    def refresh(self, user_ids: Optional[Iterable[int]]):
+        if user_ids is None:
+            # Неизвестно, кто изменился: следующий поиск запустит полную пересборку
+            with self._lock:
+                self._built_at = 0.0
+            return
+        # Маршруты передают идентификатор из JWT строкой, а снимок и загрузчик работают с числами
+        user_ids = {int(user_id) for user_id in user_ids}
+        documents = {document.user_id: document for document in self.loader(user_ids)}
+        now = time.monotonic()
+        with self._lock:
+            for user_id in user_ids:
+                self._pending[user_id] = (now, documents.get(user_id))
+
+    def search(
+            self,
+            query: str,
+            role: Optional[str] = None,
+            class_number: Optional[int] = None,
+            offset: int = 0,
+            limit: int = 20,
+            spawn: Callable[[Callable], None] = None
+    ) -> Tuple[int, List[Tuple[float, PersonDocument]]]:
+        self._ensure_fresh(spawn or (lambda target: threading.Thread(target=target, daemon=True).start()))
+        terms = words(query)
+        if not terms:
+            return 0, []
+
+        with self._lock:
+            snapshot = self._snapshot
+            pending = dict(self._pending)
+
+        total = np.zeros(len(snapshot.documents), dtype=np.float32)
+        mask = np.ones(len(snapshot.documents), dtype=bool)
+        for term in terms:
+            scores = snapshot.term_scores(term, self.similarity)
+            mask &= scores > 0
+            total += scores
+        if role is not None:
+            mask &= (snapshot.roles & (1 << ROLES.index(role))) > 0
+        if class_number is not None:
+            mask &= snapshot.class_numbers == class_number
+        overridden = [snapshot.positions[user_id] for user_id in pending if user_id in snapshot.positions]
+        mask[overridden] = False
+
+        positions = np.flatnonzero(mask)
+        # Из снимка нужны только первые offset + limit; полная сортировка - только для них
+        top = positions[np.lexsort((snapshot.name_ranks[positions], -total[positions]))][:offset + limit]
+        results = [(float(total[position]) / len(terms), snapshot.documents[position]) for position in top]
+        extra = list(self._match_pending(pending, terms, role, class_number))
+        results.extend(extra)
+        results.sort(key=lambda item: (-item[0], normalize(item[1].full_name), item[1].user_id))
+        return len(positions) + len(extra), results[offset:offset + limit]
+
+    def _match_pending(self, pending, terms, role, class_number):
+        term_grams = [term_trigrams(term) for term in terms]
+        for _, document in pending.values():
+            if document is None:
+                continue
+            if role is not None and role not in document.roles:
+                continue
+            if class_number is not None and document.class_number != class_number:
+                continue
+            document_vocabulary = document_words(document)
+            scores = []
+            for grams in term_grams:
+                best = max((term_similarity(grams, word) for word in document_vocabulary), default=0.0)
+                if best < self.similarity:
+                    break
+                scores.append(best)
+            else:
+                yield sum(scores) / len(terms), document
@@ -0,0 +1,39 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from app.metrics import metrics
+
+
+class RateLimiter:
+    # Token bucket на клиента: capacity запросов подряд, дальше rate запросов в секунду.
+    # Хранится не больше max_clients корзин, самые давние вытесняются (LRU)
+    def __init__(self, name: str, rate: float, capacity: float, max_clients: int = 10000):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> float:
+        # 0 - запрос разрешён; иначе через сколько секунд появится следующий токен
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.capacity, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            wait = (1 - bucket[0]) / self.rate
+        metrics.inc("http_rate_limited_total", (("limiter", self.name),))
+        return wait
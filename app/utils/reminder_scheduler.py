@@ -0,0 +1,91 @@
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class DueReminder(NamedTuple):
+    lesson_id: int
+    lesson_date_time: datetime
+    teacher_id: int
+    student_id: int
+    offset: timedelta
+
+
+class ReminderScheduler:
+    # Куча (время срабатывания, урок, начало урока, номер смещения). Перенос и отмена не ищут
+    # записи в куче: у урока меняется текущее начало, и устаревшие записи выбрасываются,
+    # когда доходят до вершины
+    def __init__(self, offsets: Sequence[timedelta]):
+        if not offsets:
+            raise ValueError("Нужно хотя бы одно смещение напоминания")
+        self.offsets = tuple(sorted(set(offsets), reverse=True))
+        self._heap: List[Tuple[datetime, int, datetime, int]] = []
+        # урок -> (начало, учитель, ученик)
+        self._lessons: Dict[int, Tuple[datetime, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._lessons)
+
+    def __contains__(self, lesson_id: int) -> bool:
+        return lesson_id in self._lessons
+
+    def schedule(
+            self,
+            lesson_id: int,
+            lesson_date_time: datetime,
+            teacher_id: int,
+            student_id: int,
+            now: datetime,
+            catch_up: bool = False
+    ) -> bool:
+        # catch_up - урок создан или перенесён только что: если время какого-то напоминания уже
+        # прошло, ближайшее к началу из прошедших срабатывает сразу. При первой загрузке так
+        # делать нельзя - эти напоминания уже отправил прошлый запуск
+        current = self._lessons.get(lesson_id)
+        self._lessons[lesson_id] = (lesson_date_time, teacher_id, student_id)
+        if current is not None and current[0] == lesson_date_time:
+            return False
+        if lesson_date_time <= now:
+            del self._lessons[lesson_id]
+            return False
+
+        missed = None
+        for index, offset in enumerate(self.offsets):
+            fire_at = lesson_date_time - offset
+            if fire_at > now:
+                heapq.heappush(self._heap, (fire_at, lesson_id, lesson_date_time, index))
+            else:
+                missed = index
+        if catch_up and missed is not None:
+            heapq.heappush(self._heap, (now, lesson_id, lesson_date_time, missed))
+        return True
+
+    def cancel(self, lesson_id: int) -> bool:
+        return self._lessons.pop(lesson_id, None) is not None
+
+    def _is_stale(self, lesson_id: int, lesson_date_time: datetime) -> bool:
+        current = self._lessons.get(lesson_id)
+        return current is None or current[0] != lesson_date_time
+
+    def next_fire_at(self) -> Optional[datetime]:
+        while self._heap and self._is_stale(self._heap[0][1], self._heap[0][2]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[DueReminder]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, lesson_id, lesson_date_time, index = heapq.heappop(self._heap)
+            if self._is_stale(lesson_id, lesson_date_time):
+                continue
+            _, teacher_id, student_id = self._lessons[lesson_id]
+            due.append(DueReminder(lesson_id, lesson_date_time, teacher_id, student_id, self.offsets[index]))
+        return due
+
+    def prune(self, now: datetime) -> int:
+        # Начавшиеся уроки больше не нужны; их записей в куче не осталось - последнее
+        # напоминание срабатывает раньше начала
+        started = [lesson_id for lesson_id, (starts_at, _, _) in self._lessons.items() if starts_at <= now]
+        for lesson_id in started:
+            del self._lessons[lesson_id]
+        return len(started)
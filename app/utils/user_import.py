@@ -0,0 +1,237 @@
+import csv
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from werkzeug.security import generate_password_hash
+
+IMPORT_ROLES = ('student', 'teacher', 'parent')
+REQUIRED_COLUMNS = ('full_name', 'email', 'password', 'birthday', 'gender', 'role')
+GENDERS = {'male': 'Male', 'female': 'Female'}
+# Ограничения длины - как у колонок в моделях
+MAX_LENGTHS = {
+    'full_name': 100, 'email': 100, 'city': 50, 'phone_number': 20, 'school_name': 100,
+    'main_work': 100, 'work_name': 100, 'work_phone': 20,
+}
+
+
+def hashing_pool(processes: Optional[int] = None) -> ProcessPoolExecutor:
+    # forkserver, а не fork: в процессе уже работают потоки логов, аудита и событий, и fork
+    # унёс бы их блокировки в дочерние процессы в случайном состоянии
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('forkserver'))
+
+
+def read_csv(stream: IO[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    # Excel в русской локали сохраняет CSV через ';' - разделитель определяется по заголовку
+    header = stream.readline()
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    columns = [column.strip().lower() for column in next(csv.reader([header], delimiter=delimiter), [])]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"В CSV нет обязательных колонок: {', '.join(missing)}")
+
+    reader = csv.DictReader(stream, fieldnames=columns, delimiter=delimiter)
+    for row in reader:
+        if not any((value or '').strip() for value in row.values() if isinstance(value, str)):
+            continue
+        # Номер строки в файле с учётом заголовка - по нему ошибки ищут в исходной таблице
+        yield reader.line_num + 1, {key: (value or '').strip() for key, value in row.items()
+                                    if key is not None and isinstance(value, str)}
+
+
+def _integer(row: dict, column: str, errors: List[str], minimum: int = 0) -> Optional[int]:
+    if not row.get(column):
+        return None
+    try:
+        value = int(row[column])
+    except ValueError:
+        errors.append(f"{column}: ожидается целое число")
+        return None
+    if value < minimum:
+        errors.append(f"{column}: должно быть не меньше {minimum}")
+        return None
+    return value
+
+
+def validate_row(row: dict) -> Tuple[Optional[dict], List[str]]:
+    errors = [f"{column}: обязательное поле" for column in REQUIRED_COLUMNS if not row.get(column)]
+    errors += [f"{column}: не длиннее {limit} символов"
+               for column, limit in MAX_LENGTHS.items() if len(row.get(column, '')) > limit]
+
+    email = row.get('email', '')
+    if email and ('@' not in email or ' ' in email):
+        errors.append("email: некорректный адрес")
+    role = row.get('role', '').lower()
+    if role and role not in IMPORT_ROLES:
+        errors.append(f"role: одно из {', '.join(IMPORT_ROLES)}")
+    gender = GENDERS.get(row.get('gender', '').lower())
+    if row.get('gender') and gender is None:
+        errors.append("gender: Male или Female")
+    birthday = None
+    if row.get('birthday'):
+        try:
+            birthday = date.fromisoformat(row['birthday'])
+        except ValueError:
+            errors.append("birthday: формат YYYY-MM-DD")
+
+    class_number = _integer(row, 'class_number', errors, minimum=1)
+    experience = _integer(row, 'experience', errors)
+    if errors:
+        return None, errors
+
+    user = {
+        'full_name': row['full_name'],
+        'email': email,
+        'password': row['password'],
+        'birthday': birthday,
+        'gender': gender,
+        'city': row.get('city', ''),
+        'phone_number': row.get('phone_number', ''),
+        'role': role,
+        'teacher_email': row.get('teacher_email') or None,
+    }
+    if role == 'student':
+        user.update(class_number=class_number, school_name=row.get('school_name') or None)
+    elif role == 'teacher':
+        user.update(experience=experience or 0, main_work=row.get('main_work', ''))
+    else:
+        user.update(work_name=row.get('work_name') or None, work_phone=row.get('work_phone') or None)
+    return user, []
+
+
+class UserImporter:
+    # Импорт пачками: проверка строк, хеширование паролей в пуле процессов, вставка пачки
+    # многострочными INSERT в одной транзакции. Если пачка упала на ограничении целостности
+    # (кто-то успел зарегистрироваться с тем же email), она повторяется по одной строке.
+    # Ученики, чей teacher_email не найден ни в базе, ни среди уже созданных импортом учителей,
+    # откладываются до конца файла: учитель может идти в той же пачке или ниже
+    def __init__(
+            self,
+            repo,
+            generate_code: Callable[[], str],
+            pool: Optional[Executor] = None,
+            batch_size: int = 500,
+            teacher_id: Optional[int] = None,
+            max_rows: Optional[int] = None
+    ):
+        self.repo = repo
+        self.generate_code = generate_code
+        self.pool = pool
+        self.batch_size = batch_size
+        self.teacher_id = teacher_id
+        self.max_rows = max_rows
+        # email учителя -> user_id для учителей, созданных этим импортом
+        self._created_teachers: Dict[str, int] = {}
+        self._deferred: List[Tuple[dict, dict]] = []
+
+    def _hash(self, passwords: List[str]) -> List[str]:
+        if self.pool is None or len(passwords) < 2:
+            return [generate_password_hash(password) for password in passwords]
+        chunksize = max(1, len(passwords) // 32)
+        return list(self.pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+    def run(self, rows: Iterable[Tuple[int, Dict[str, str]]]) -> dict:
+        report = []
+        seen = set()
+        rows = iter(rows)
+        processed = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            valid = []
+            for line, row in batch:
+                processed += 1
+                entry = {"line": line, "email": row.get('email'), "status": "failed", "errors": []}
+                report.append(entry)
+                if self.max_rows is not None and processed > self.max_rows:
+                    entry.update(status="skipped", errors=[f"Превышен лимит в {self.max_rows} строк"])
+                    continue
+                user, entry["errors"] = validate_row(row)
+                if user is None:
+                    continue
+                key = user['email'].lower()
+                if key in seen:
+                    entry["errors"] = ["email: повторяется в файле"]
+                    continue
+                seen.add(key)
+                valid.append((entry, user))
+            self._import_batch(valid)
+
+        deferred, self._deferred = self._deferred, []
+        for start in range(0, len(deferred), self.batch_size):
+            self._import_batch(deferred[start:start + self.batch_size], final=True)
+
+        created = sum(1 for entry in report if entry["status"] == "created")
+        return {
+            "created": created,
+            "failed": sum(1 for entry in report if entry["status"] == "failed"),
+            "skipped": sum(1 for entry in report if entry["status"] == "skipped"),
+            "rows": report,
+        }
+
+    def _import_batch(self, valid: List[Tuple[dict, dict]], final: bool = False):
+        if not valid:
+            return
+        existing = self.repo.get_existing_emails([user['email'] for _, user in valid])
+        teachers = self.repo.get_teacher_ids_by_email(
+            {user['teacher_email'] for _, user in valid if user['teacher_email']}
+        )
+        teachers.update(self._created_teachers)
+
+        ready = []
+        for entry, user in valid:
+            if user['email'].lower() in existing:
+                entry["errors"] = ["Пользователь с таким email уже существует"]
+                continue
+            teacher_ids = {self.teacher_id} if self.teacher_id is not None and user['role'] == 'student' else set()
+            if user['teacher_email']:
+                if user['role'] != 'student':
+                    entry["errors"] = ["teacher_email: связь с учителем бывает только у ученика"]
+                    continue
+                teacher_id = teachers.get(user['teacher_email'].lower())
+                if teacher_id is None:
+                    if not final:
+                        self._deferred.append((entry, user))
+                    else:
+                        entry["errors"] = [f"teacher_email: учитель {user['teacher_email']} не найден"]
+                    continue
+                teacher_ids.add(teacher_id)
+            user['teacher_ids'] = sorted(teacher_ids)
+            ready.append((entry, user))
+        if not ready:
+            return
+
+        for (_, user), password_hash in zip(ready, self._hash([user['password'] for _, user in ready])):
+            user['password_hash'] = password_hash
+            user['unique_code'] = self.generate_code()
+
+        try:
+            ids = self.repo.bulk_create_users([user for _, user in ready])
+        except ValueError as e:
+            if len(ready) == 1:
+                ready[0][0]["errors"] = [str(e)]
+            else:
+                for entry, user in ready:
+                    self._insert_one(entry, user)
+            return
+        for entry, user in ready:
+            self._created(entry, user, ids[user['email'].lower()])
+
+    def _created(self, entry: dict, user: dict, user_id: int):
+        entry.update(status="created", user_id=user_id)
+        if user['role'] == 'teacher':
+            self._created_teachers[user['email'].lower()] = user_id
+
+    def _insert_one(self, entry: dict, user: dict):
+        try:
+            ids = self.repo.bulk_create_users([user])
+        except ValueError as e:
+            if self.repo.get_existing_emails([user['email']]):
+                entry["errors"] = ["Пользователь с таким email уже существует"]
+            else:
+                entry["errors"] = [str(e)]
+            return
+        self._created(entry, user, ids[user['email'].lower()])
@@ -0,0 +1,55 @@
+from datetime import date, time
+
+import numpy as np
+
+HOURS = 24
+WEEKDAYS = 7
+CELLS = WEEKDAYS * HOURS
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def occupied_minutes(starts: np.ndarray, durations: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    # starts - datetime64[m], durations - минуты, groups - номер аудитории 0..n_groups-1.
+    # Урок раскладывается по часам, которые он задевает: на каждом шаге k все уроки сразу
+    # получают свой k-й час, так что цикл идёт по числу часов в самом длинном уроке, а не по урокам
+    result = np.zeros(n_groups * CELLS, dtype=np.float64)
+    if starts.size == 0:
+        return result.reshape(n_groups, WEEKDAYS, HOURS)
+
+    start = starts.astype(np.int64)
+    end = start + durations.astype(np.int64)
+    first_hour = start - start % 60
+    steps = int(((start % 60) + durations).max() // 60) + 1
+
+    for k in range(steps):
+        hour_start = first_hour + 60 * k
+        overlap = np.minimum(end, hour_start + 60) - np.maximum(start, hour_start)
+        mask = overlap > 0
+        if not mask.any():
+            continue
+        hour_start = hour_start[mask]
+        # 1970-01-01 - четверг, поэтому понедельник = (дни + 3) % 7
+        weekday = (hour_start // 1440 + 3) % 7
+        hour = (hour_start // 60) % 24
+        cell = groups[mask] * CELLS + weekday * HOURS + hour
+        result += np.bincount(cell, weights=overlap[mask], minlength=n_groups * CELLS)
+    return result.reshape(n_groups, WEEKDAYS, HOURS)
+
+
+def available_minutes(first_day: date, last_day: date, working_start: time, working_end: time) -> np.ndarray:
+    days = np.arange(np.datetime64(first_day), np.datetime64(last_day) + 1, dtype='datetime64[D]')
+    weekday_counts = np.bincount((days.astype(np.int64) + 3) % 7, minlength=WEEKDAYS)
+    hour_starts = np.arange(HOURS) * 60
+    hour_open = np.clip(
+        np.minimum(_minutes(working_end), hour_starts + 60) - np.maximum(_minutes(working_start), hour_starts),
+        0, 60
+    )
+    return np.outer(weekday_counts, hour_open).astype(np.float64)
+
+
+def utilisation(occupied: np.ndarray, available: np.ndarray) -> np.ndarray:
+    # Занятость вне рабочих часов не делит на ноль, а даёт 0
+    return np.divide(occupied, available, out=np.zeros_like(occupied), where=available > 0)
@@ -0,0 +1,5 @@
+import os
+
+from app.asgi import create_asgi_app
+
+app = create_asgi_app(os.environ.get('APP_CONFIG', 'production'))
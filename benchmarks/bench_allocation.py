@@ -0,0 +1,119 @@
+"""Benchmark the classroom allocation engine on synthetic branch schedules.
+
+    python -m benchmarks.bench_allocation --rooms 40 --lessons-per-day 400 --days 7
+
+Compares incremental best-fit booking (lessons arrive in random order, as
+they are booked) with full re-optimisation (greedy interval partitioning),
+and reports rooms used against the lower bound (maximum overlap).
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.utils.classroom_allocation import RoomTimeline, max_overlap, partition
+
+DURATIONS = (30, 45, 60)
+
+
+def generate_lessons(days, lessons_per_day, rng, start=datetime(2030, 1, 7)):
+    lessons = []
+    lesson_id = 1
+    for day in range(days):
+        opening = start + timedelta(days=day, hours=8)
+        for _ in range(lessons_per_day):
+            duration = rng.choice(DURATIONS)
+            # Шаг 15 минут, урок заканчивается не позже 20:00
+            begins = opening + timedelta(minutes=15 * rng.randrange((12 * 60 - duration) // 15 + 1))
+            lessons.append((lesson_id, begins, begins + timedelta(minutes=duration), None))
+            lesson_id += 1
+    return lessons
+
+
+def run_incremental(lessons, rooms, rng):
+    booking_order = list(lessons)
+    rng.shuffle(booking_order)
+    timeline = RoomTimeline(rooms)
+    assignment = {}
+    unassigned = []
+    started = time.perf_counter()
+    for lesson_id, start, end, _ in booking_order:
+        room = timeline.assign(start, end)
+        if room is None:
+            unassigned.append(lesson_id)
+        else:
+            assignment[lesson_id] = room
+    elapsed = time.perf_counter() - started
+    return elapsed, assignment, unassigned
+
+
+def run_full(lessons, rooms):
+    started = time.perf_counter()
+    assignment, unassigned = partition(lessons, rooms)
+    return time.perf_counter() - started, assignment, unassigned
+
+
+def rooms_used_per_day(lessons, assignment):
+    used = {}
+    for lesson_id, start, _, _ in lessons:
+        if lesson_id in assignment:
+            used.setdefault(start.date(), set()).add(assignment[lesson_id])
+    return max((len(rooms) for rooms in used.values()), default=0)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--lessons-per-day", type=int, default=400)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rooms = list(range(1, args.rooms + 1))
+    results = {"incremental": [], "full": []}
+    summary = {}
+
+    for attempt in range(args.repeat):
+        rng = random.Random(args.seed + attempt)
+        lessons = generate_lessons(args.days, args.lessons_per_day, rng)
+        daily_bound = max(max_overlap([lesson for lesson in lessons if lesson[1].date() == day])
+                          for day in {lesson[1].date() for lesson in lessons})
+
+        for mode in ("incremental", "full"):
+            if mode == "incremental":
+                elapsed, assignment, unassigned = run_incremental(lessons, rooms, rng)
+            else:
+                elapsed, assignment, unassigned = run_full(lessons, rooms)
+            results[mode].append(elapsed)
+            summary[mode] = {
+                "unassigned": len(unassigned),
+                "max_rooms_used_per_day": rooms_used_per_day(lessons, assignment),
+            }
+        summary["lower_bound_rooms_per_day"] = daily_bound
+
+    summary["lessons"] = args.days * args.lessons_per_day
+    summary["rooms"] = args.rooms
+    for mode, timings in results.items():
+        summary[mode]["median_ms"] = round(statistics.median(timings) * 1000, 2)
+        summary[mode]["per_lesson_us"] = round(statistics.median(timings) / summary["lessons"] * 1e6, 2)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{summary['lessons']} lessons over {args.days} days, {args.rooms} rooms, "
+          f"lower bound {summary['lower_bound_rooms_per_day']} rooms/day")
+    for mode in ("incremental", "full"):
+        item = summary[mode]
+        print(f"{mode:12s} {item['median_ms']:9.2f}ms  {item['per_lesson_us']:7.2f}us/lesson  "
+              f"rooms/day={item['max_rooms_used_per_day']:3d}  unassigned={item['unassigned']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Compare the dev server with the pre-fork gunicorn entry point.
+
+    python -m benchmarks.bench_server --workers 4 --threads 4 --duration 10
+
+For each setup the server is started against the same seeded SQLite file,
+driven with keep-alive HTTP clients for --duration seconds, and its memory
+is read from /proc (RSS double-counts pages shared copy-on-write, PSS does not).
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.run_benchmarks import percentile
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in os.listdir("/proc"):
+        if not child.isdigit():
+            continue
+        try:
+            with open(f"/proc/{child}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if parent == pid:
+            pids.extend(process_tree(int(child)))
+    return pids
+
+
+def memory_kb(pid):
+    totals = {"rss_kb": 0, "pss_kb": 0}
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/smaps_rollup") as f:
+                for line in f:
+                    key, value = line.split(":", 1)
+                    if key in ("Rss", "Pss"):
+                        totals[f"{key.lower()}_kb"] += int(value.split()[0])
+        except OSError:
+            continue
+    totals["processes"] = len(process_tree(pid))
+    return totals
+
+
+def drive(port, clients, duration):
+    body = json.dumps({"email": "seed.5@example.test"})
+    headers = {"Content-Type": "application/json"}
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local = []
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                connection.request("POST", "/auth/check_email", body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[0] += 1
+            except (OSError, http.client.HTTPException):
+                errors[0] += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def run_setup(name, command, env, clients, duration):
+    command, env = command[0], dict(env, **command[1])
+    port = free_port()
+    command = [part.format(port=port) for part in command]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        wait_until_up(port)
+        time.sleep(1)
+        idle = memory_kb(process.pid)
+        load = drive(port, clients, duration)
+        loaded = memory_kb(process.pid)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    result = {"memory_idle": idle, "memory_after_load": loaded, **load}
+    print(f"{name:22s} rps={load['throughput_rps']:8.1f} p50={load['p50_ms']:7.2f}ms p99={load['p99_ms']:7.2f}ms "
+          f"errors={load['errors']} processes={idle['processes']} "
+          f"rss={idle['rss_kb'] / 1024:.1f}MiB pss={idle['pss_kb'] / 1024:.1f}MiB")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--scale", type=float, default=0.3)
+    parser.add_argument("--output", help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    env = dict(os.environ, APP_CONFIG="testing", TEST_DATABASE_URL=f"sqlite:///{database}",
+               GUNICORN_WORKERS=str(args.workers), GUNICORN_THREADS=str(args.threads),
+               METRICS_MULTIPROC_DIR=tempfile.mkdtemp())
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    subprocess.check_call([sys.executable, "-m", "flask", "--app", "wsgi", "seed", "--scale", str(args.scale)],
+                          env=env, stdout=subprocess.DEVNULL)
+
+    gunicorn = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", "127.0.0.1:{port}", "wsgi:app"]
+    setups = {
+        "dev_server": ([sys.executable, "-m", "flask", "--app", "wsgi", "run", "--port", "{port}", "--with-threads"], {}),
+        "gunicorn_no_preload": (gunicorn, {"GUNICORN_PRELOAD": "0"}),
+        "gunicorn_preload": (gunicorn, {"GUNICORN_PRELOAD": "1"}),
+    }
+    results = {name: run_setup(name, command, env, args.clients, args.duration) for name, command in setups.items()}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
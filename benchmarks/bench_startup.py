@@ -0,0 +1,79 @@
+"""Measure cold start: interpreter + imports + create_app() + first served request.
+
+    python -m benchmarks.bench_startup --runs 10
+
+Every run is a fresh interpreter, so import and mapper configuration costs
+are paid each time, as after a deploy or an autoscale event.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app('testing')
+created = time.perf_counter()
+response = app.test_client().post('/auth/check_email', json={'email': 'cold@start.test'})
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+startup = app.extensions['startup']
+print(json.dumps({
+    'import_s': imported - started,
+    'create_app_s': created - imported,
+    'first_request_s': served - created,
+    'total_s': served - started,
+    'blueprint_imports_s': startup['imports'],
+    'configure_mappers_s': startup.get('configure_mappers'),
+}))
+"""
+
+VARIANTS = {
+    "lazy_mappers": {"FLASK_EAGER_MAPPER_CONFIGURATION": "false"},
+    "eager_mappers": {"FLASK_EAGER_MAPPER_CONFIGURATION": "true"},
+    "eager_auth_only": {"FLASK_EAGER_MAPPER_CONFIGURATION": "true", "FLASK_ENABLED_BLUEPRINTS": '["auth"]'},
+}
+
+
+def run_variant(env_overrides, runs):
+    env = dict(os.environ, **env_overrides)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", CHILD], env=env, stderr=subprocess.DEVNULL)
+        samples.append(json.loads(output.decode().strip().splitlines()[-1]))
+    summary = {}
+    for key in ("import_s", "create_app_s", "first_request_s", "total_s"):
+        values = sorted(sample[key] for sample in samples)
+        summary[key] = {"median_ms": round(statistics.median(values) * 1000, 2), "max_ms": round(values[-1] * 1000, 2)}
+    summary["blueprint_imports_ms"] = {
+        name: round(statistics.median(sample["blueprint_imports_s"][name] for sample in samples) * 1000, 2)
+        for name in samples[0]["blueprint_imports_s"]
+    }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    results = {name: run_variant(overrides, args.runs) for name, overrides in VARIANTS.items()}
+    for name, summary in results.items():
+        print(f"{name:16s} " + "  ".join(
+            f"{key}={summary[key]['median_ms']:.1f}ms" for key in ("import_s", "create_app_s", "first_request_s", "total_s")
+        ))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
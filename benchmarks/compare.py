@@ -0,0 +1,59 @@
+"""Diff two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 when any scenario regresses by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+CHECKS = (
+    ("p50 ms", lambda s: s["latency_ms"]["p50"], True),
+    ("p95 ms", lambda s: s["latency_ms"]["p95"], True),
+    ("p99 ms", lambda s: s["latency_ms"]["p99"], True),
+    ("rps", lambda s: s["throughput_rps"], False),
+    ("q/req", lambda s: s["queries_per_request"], True),
+)
+
+
+def compare(baseline, candidate, threshold):
+    regressions = []
+    rows = []
+    for name in sorted(set(baseline["scenarios"]) & set(candidate["scenarios"])):
+        old, new = baseline["scenarios"][name], candidate["scenarios"][name]
+        for label, getter, lower_is_better in CHECKS:
+            before, after = getter(old), getter(new)
+            change = (after - before) / before if before else 0.0
+            worse = change > threshold if lower_is_better else change < -threshold
+            rows.append((name, label, before, after, change, worse))
+            if worse:
+                regressions.append((name, label))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change treated as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    for name, label, before, after, change, worse in rows:
+        marker = "  REGRESSION" if worse else ""
+        print(f"{name:48s} {label:7s} {before:10.2f} -> {after:10.2f} ({change:+7.1%}){marker}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# Продакшен-запуск: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Приложение загружается один раз в мастере (preload_app) и наследуется воркерами
+# через copy-on-write. SIGHUP перезапускает воркеры без потери соединений, но код
+# при preload_app не перечитывается: для выката новой версии отправьте мастеру USR2,
+# дождитесь нового мастера и остановите старый через WINCH + TERM.
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+# Метрики воркеров складываются в общий каталог и суммируются при опросе /metrics
+os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'speechtherapistsoffice-metrics'))
+
+
+def on_starting(server):
+    for path in glob.glob(os.path.join(os.environ['METRICS_MULTIPROC_DIR'], 'metrics-*.json')):
+        os.remove(path)
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+
+    from app.db import db
+
+    app = server.app.wsgi()
+    # Соединения, открытые мастером при загрузке, не должны унаследоваться воркерами
+    with app.app_context():
+        db.engine.dispose()
+    # Всё, что создано при загрузке, переносится в постоянное поколение: сборщик мусора
+    # в воркерах не будет трогать эти объекты и копировать их страницы памяти
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.db import db
+    from app.startup import warm_pool
+
+    app = server.app.wsgi()
+    with app.app_context():
+        # close=False: сокеты родителя не закрываем, а просто забываем о них в этом процессе
+        db.engine.dispose(close=False)
+    warm_pool(app)